@@ -6,14 +6,172 @@ Stage 2: Deep analysis with Q&A (reuses KV cache)
 """
 
 import asyncio
-from openai import AsyncOpenAI
+import aiofiles
+import httpx
+from openai import AsyncOpenAI, APIStatusError
+from collections import OrderedDict
 from typing import List, Optional
 import json
+import logging
 import os
+import random
+import re
 from pathlib import Path
 import time
 
-from models import Paper, QAPair, Config
+try:
+    import orjson  # Optional C JSON codec, much faster on large paper dicts
+except ImportError:
+    orjson = None
+
+from models import Paper, QAPair, Config, dump_paper_json, html_body_path, read_html_body, write_html_body
+from llm_cache import LLMCache
+
+logger = logging.getLogger("analyzer")
+
+
+# Fixed scaffolding shared by every stage-2 / custom-question request.
+# Everything here is byte-identical across papers and runs, so together with
+# config.system_prompt it forms the longest reusable prefix for DeepSeek's
+# prefix cache. Never put timestamps or per-paper text in here.
+STATIC_SYSTEM_PREFIX = """The paper to analyze is provided in the first user message.
+Every following user message is a question about that paper. Answer based on the paper content."""
+
+# Fixed assistant turn after the paper block. Keeps user/assistant turns
+# alternating so follow-up history can be appended after the paper.
+PAPER_ACK = "I have read the paper. Please ask your question."
+
+
+# Stream coalescing: flush buffered deltas once either limit is reached
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_SECONDS = 0.02
+
+# Analyzed referenced papers kept in memory (LRU) for follow-up questions
+REF_PAPER_CACHE_SIZE = 64
+
+# Referenced papers in questions: [2510.09212] or [2510.09212v1]
+_ARXIV_ID_RE = re.compile(r'\[(\d{4}\.\d{4,5}(?:v\d+)?)\]')
+
+# Permanent client errors - retrying cannot fix these
+NON_RETRYABLE_STATUS = {400, 401, 403, 404, 422}
+MAX_BACKOFF_SECONDS = 30
+
+
+def _is_retryable(error: Exception) -> bool:
+    """429, 5xx, timeouts and network errors are retryable; other 4xx are not"""
+    if isinstance(error, APIStatusError):
+        return error.status_code not in NON_RETRYABLE_STATUS
+    return True
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Capped exponential backoff with jitter, so retries don't hit the API in lockstep"""
+    return min(MAX_BACKOFF_SECONDS, (2 ** attempt) * (0.5 + random.random()))
+
+
+def _normalize_block(text: str) -> str:
+    """Normalize newlines and trailing whitespace so the same paper always renders to the same bytes"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def _json_loads(text):
+    return orjson.loads(text) if orjson else json.loads(text)
+
+
+def _normalize_answer(text: str) -> str:
+    """Stored answers end in exactly one newline (they are replayed as prompt context)"""
+    return text.rstrip() + "\n"
+
+
+def _write_html_once(data_dir: Path, paper_id: str, html_content: str):
+    """Write <id>.html.gz unless it exists (the text never changes); blocking, run in a thread"""
+    if not html_body_path(data_dir, paper_id).exists():
+        write_html_body(data_dir, paper_id, html_content)
+
+
+class PaperWriter:
+    """
+    Coalesces paper saves: keeps only the latest dict per paper id and
+    flushes dirty entries to disk after a short debounce (or on flush()).
+    """
+    
+    RETRY_DELAY = 5.0  # Seconds before the background loop retries a failed flush
+    CLOSE_ATTEMPTS = 3  # flush() attempts in aclose() before giving up loudly
+    
+    def __init__(self, data_dir: Path, delay: float = 0.25):
+        self.data_dir = data_dir
+        self.delay = delay
+        self._pending: dict[str, dict] = {}
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # One flush at a time (shared .tmp names)
+    
+    def mark_dirty(self, paper_id: str, data: dict):
+        """Queue the latest state of a paper; later calls overwrite earlier ones"""
+        self._pending[paper_id] = data
+        self._dirty.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.delay)  # Debounce: let more saves pile up
+            self._dirty.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Failed papers are back in _pending: retry later, don't spin on a full disk
+                logger.warning(f"  ⚠️ Paper flush failed, retrying in {self.RETRY_DELAY}s: {e}")
+                self._dirty.set()
+                await asyncio.sleep(self.RETRY_DELAY)
+    
+    async def flush(self):
+        """
+        Write all pending papers now (atomic temp file + rename).
+        A paper leaves the queue only once its file is replaced; on error the
+        unwritten ones are re-queued (unless a newer state arrived) and it raises.
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            items = list(pending.items())
+            for index, (paper_id, data) in enumerate(items):
+                try:
+                    html_content = data.get("html_content", "")
+                    if html_content:
+                        # Paper saved before the split (inline HTML): move the text out once
+                        await asyncio.get_running_loop().run_in_executor(None, _write_html_once, self.data_dir, paper_id, html_content)
+                    # Copy: the queued dict keeps its html_content in case this write fails
+                    payload = dump_paper_json(dict(data, html_content=""))  # Kept in <id>.html.gz
+                    file_path = self.data_dir / f"{paper_id}.json"
+                    tmp_path = self.data_dir / f"{paper_id}.json.tmp"
+                    async with aiofiles.open(tmp_path, 'wb') as f:
+                        await f.write(payload)
+                    os.replace(tmp_path, file_path)
+                except BaseException:
+                    for failed_id, failed_data in items[index:]:
+                        self._pending.setdefault(failed_id, failed_data)
+                    raise
+    
+    async def aclose(self):
+        """Stop the background loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for attempt in range(self.CLOSE_ATTEMPTS):
+            try:
+                await self.flush()
+                return
+            except Exception as e:
+                if attempt == self.CLOSE_ATTEMPTS - 1:
+                    raise  # Don't drop unsaved papers silently on shutdown
+                logger.warning(f"  ⚠️ Paper flush failed on close, retrying: {e}")
+                await asyncio.sleep(1.0)
 
 
 class DeepSeekAnalyzer:
@@ -24,50 +182,141 @@ class DeepSeekAnalyzer:
     only change the question to maximize cache hits.
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, fetcher=None, on_save=None):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
             raise ValueError("DEEPSEEK_API_KEY not set")
         
+        # One pooled HTTP/2 client for all DeepSeek calls: concurrent requests
+        # multiplex over a few warm TLS connections instead of opening new ones
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
         self.client = AsyncOpenAI(
             api_key=self.api_key,
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            http_client=self._http,
+            max_retries=0,  # Retries are handled explicitly (see _backoff_delay)
         )
         
         self.data_dir = Path("data/papers")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Batched, debounced paper JSON writes
+        self._writer = PaperWriter(self.data_dir)
+        
+        # Exact-match response cache for deterministic calls (temperature == 0)
+        self.llm_cache = LLMCache(str(self.data_dir.parent / "llm_cache.sqlite3"))
+        
+        # Global gate for outbound API calls (created on first use from config)
+        self._sem: Optional[asyncio.Semaphore] = None
+        
+        # Shared ArxivFetcher for referenced papers (injected or created lazily)
+        self._fetcher = fetcher
+        
+        # Optional callback(paper) after every save (keeps in-memory caches current)
+        self.on_save = on_save
+        
+        # ref_id -> analyzed Paper, most recently used last
+        self._ref_paper_cache: "OrderedDict[str, Paper]" = OrderedDict()
+        
+        # DeepSeek server-side prefix cache usage (prompt tokens), summed over all calls
+        self._stats = {"cache_hit": 0, "cache_miss": 0}
+    
+    def _get_fetcher(self):
+        """Return the shared ArxivFetcher, creating it on first use"""
+        if self._fetcher is None:
+            from fetcher import ArxivFetcher
+            self._fetcher = ArxivFetcher()
+        return self._fetcher
+    
+    async def flush_saves(self):
+        """Write all queued paper saves now (e.g. before the paper files are cleaned up)"""
+        await self._writer.flush()
+    
+    async def aclose(self):
+        """Flush pending paper writes and release network resources on shutdown"""
+        await self._writer.aclose()
+        await self.client.close()
+        await self._http.aclose()
+        self.llm_cache.close()
+    
+    def _record_usage(self, usage):
+        """Accumulate DeepSeek prompt_cache_hit/miss_tokens from a response usage block"""
+        if not usage:
+            return
+        self._stats["cache_hit"] += getattr(usage, "prompt_cache_hit_tokens", 0) or 0
+        self._stats["cache_miss"] += getattr(usage, "prompt_cache_miss_tokens", 0) or 0
+    
+    def _get_semaphore(self, config: Config) -> asyncio.Semaphore:
+        """Shared semaphore bounding concurrent API requests across all stages"""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(config.max_concurrent_requests or 16)
+        return self._sem
     
     async def stage1_filter(self, paper: Paper, config: Config) -> Paper:
         """
         Stage 1: Quick filter.
         Determines if paper is relevant based on keywords.
         First checks negative keywords - if matched, score=1 (irrelevant).
+        With enable_stage1_fastpath, clear keyword (non-)overlap is decided locally.
         
         Retry logic: Up to 3 attempts with exponential backoff.
         Failed records are NOT saved.
         """
+        # Hard cap on preview size, sliced once: bounds prompt tokens per paper
+        max_preview_chars = getattr(config, "stage1_max_preview_chars", 2500)
+        preview = paper.preview_text[:max_preview_chars] if max_preview_chars else paper.preview_text
+        searchable_text = f"{paper.title} {preview}".lower()
+        
+        # One pass over the text finds every filter and negative keyword
+        matched = config.match_keywords(searchable_text)
+        
         # Check negative keywords first (fast path for rejection)
-        if config.negative_keywords:
-            searchable_text = f"{paper.title} {paper.preview_text}".lower()
+        if matched and config.negative_keywords:
             for neg_kw in config.negative_keywords:
-                if neg_kw.lower() in searchable_text:
+                if neg_kw in matched:
                     paper.is_relevant = False
                     paper.relevance_score = 1.0
                     paper.extracted_keywords = [f"❌ {neg_kw}"]
                     paper.one_line_summary = f"论文包含负面关键词「{neg_kw}」，自动标记为不相关"
-                    self._save_paper(paper)
-                    print(f"  Stage 1: ✗ Negative keyword '{neg_kw}' matched - {paper.id}")
+                    await self._save_paper(paper)
+                    logger.debug(f"  Stage 1: ✗ Negative keyword '{neg_kw}' matched - {paper.id}")
+                    return paper
+        
+        # Optional keyword-overlap fast path: obvious cases skip the API call
+        if config.enable_stage1_fastpath and config.filter_keywords:
+            hits = [kw for kw in config.filter_keywords if kw in matched]
+            
+            if not hits and len(preview) < 500:
+                paper.is_relevant = False
+                paper.relevance_score = 2.0
+                paper.extracted_keywords = []
+                paper.one_line_summary = "论文与关键词无重合，自动标记为不相关"
+                await self._save_paper(paper)
+                logger.debug(f"  Stage 1: ✗ No keyword overlap (fast path) - {paper.id}")
+                return paper
+            
+            if len(hits) >= max(3, len(config.filter_keywords) // 2):
+                paper.is_relevant = True
+                paper.relevance_score = 7.0
+                paper.extracted_keywords = sorted(set(hits))
+                if not config.strict_stage1:
+                    paper.one_line_summary = f"论文命中 {len(hits)} 个关键词，自动标记为相关"
+                    await self._save_paper(paper)
+                    logger.debug(f"  Stage 1: ✓ {len(hits)} keyword hits (fast path) - {paper.id}")
                     return paper
+                # strict_stage1: tentative result, the LLM below has the final say
         
         # Normal analysis if no negative keywords matched
+        # Static instructions first (identical for every paper in the batch),
+        # per-paper title/preview last -> stage-1 requests share a cached prefix
         prompt = f"""分析这篇论文预览，判断它与以下关键词的相关性：
 
 关键词：{', '.join(config.filter_keywords)}
 
-论文标题：{paper.title}
-论文预览：
-{paper.preview_text}
-
 请用 JSON 格式回答：
 {{
     "is_relevant": true/false,
@@ -75,13 +324,18 @@ class DeepSeekAnalyzer:
     "extracted_keywords": ["关键词1", "关键词2", ...],
     "one_line_summary": "一句话总结（中文）"
 }}
+
+论文标题：{paper.title}
+论文预览：
+{preview}
 """
         
         # Retry logic: up to 3 attempts
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = await self.client.chat.completions.create(
+                content = await self._cached_completion(
+                    config,
                     model=config.model,
                     messages=[
                         {"role": "system", "content": config.system_prompt},
@@ -92,31 +346,35 @@ class DeepSeekAnalyzer:
                     response_format={"type": "json_object"}
                 )
                 
-                result = json.loads(response.choices[0].message.content)
+                result = _json_loads(content)
                 
                 paper.is_relevant = result.get("is_relevant", False)
                 paper.relevance_score = float(result.get("relevance_score", 0))
-                paper.extracted_keywords = result.get("extracted_keywords", [])
+                # Sorted + deduped so paper JSON is byte-stable between runs
+                paper.extracted_keywords = sorted(set(
+                    k.strip() for k in result.get("extracted_keywords", [])
+                    if isinstance(k, str) and k.strip()
+                ))
                 paper.one_line_summary = result.get("one_line_summary", "")
                 
                 # Save updated paper ONLY on success
-                self._save_paper(paper)
+                await self._save_paper(paper)
                 
                 score_display = f"({paper.relevance_score}/10)" if paper.relevance_score > 0 else ""
-                print(f"  Stage 1: {'✓ Relevant' if paper.is_relevant else '✗ Not relevant'} {score_display} - {paper.id}")
+                logger.debug(f"  Stage 1: {'✓ Relevant' if paper.is_relevant else '✗ Not relevant'} {score_display} - {paper.id}")
                 
                 return paper
             
             except Exception as e:
-                if attempt < max_retries - 1:
-                    # Exponential backoff: 1s, 2s
-                    wait_time = 2 ** attempt
-                    print(f"  Stage 1 retry {attempt + 1}/{max_retries} for {paper.id} after {wait_time}s: {e}")
+                if attempt < max_retries - 1 and _is_retryable(e):
+                    wait_time = _backoff_delay(attempt)
+                    logger.warning(f"  Stage 1 retry {attempt + 1}/{max_retries} for {paper.id} after {wait_time:.1f}s: {e}")
                     await asyncio.sleep(wait_time)
                 else:
                     # Final failure - do NOT save
-                    print(f"  Stage 1 FAILED after {max_retries} attempts for {paper.id}: {e}")
+                    logger.warning(f"  Stage 1 FAILED after {attempt + 1} attempts for {paper.id}: {e}")
                     paper.is_relevant = None  # Mark as unprocessed
+                    break
         
         return paper
     
@@ -131,11 +389,7 @@ class DeepSeekAnalyzer:
         
         # Build cache prefix (system prompt + paper content)
         # This stays the same for all questions -> KV cache hit
-        cache_prefix = f"""Paper Title: {paper.title}
-
-Paper Content:
-{paper.html_content or paper.abstract}
-"""
+        cache_prefix = await self._paper_cache_prefix(paper, config)
         
         # 1. Generate detailed summary first
         detailed_summary_question = """请用中文生成这篇论文的详细摘要（约200-300字），包括：
@@ -155,40 +409,45 @@ Paper Content:
         
         if detailed_summary is None:
             # Failed after retries - do NOT save
-            print(f"  Stage 2 FAILED to generate summary for {paper.id}")
+            logger.warning(f"  Stage 2 FAILED to generate summary for {paper.id}")
             return paper
         
         paper.detailed_summary = detailed_summary
-        print(f"  Stage 2: Generated detailed summary for {paper.id}")
+        logger.debug(f"  Stage 2: Generated detailed summary for {paper.id}")
         
-        # 2. Ask each preset question
-        all_success = True
-        for question in config.preset_questions:
-            answer = await self._ask_question_with_retry(
+        # 2. Ask all preset questions concurrently
+        # Every call shares the same cache_prefix, so the prefix prefill is
+        # served from DeepSeek's KV cache and K questions cost ~1 round-trip.
+        answers = await asyncio.gather(*[
+            self._ask_question_with_retry(
                 cache_prefix=cache_prefix,
                 question=question,
                 config=config,
                 cache_id=paper.id
             )
-            
+            for question in config.preset_questions
+        ])
+        
+        all_success = True
+        for question, answer in zip(config.preset_questions, answers):
             if answer is None:
-                # Failed after retries
-                print(f"  Stage 2 FAILED for {paper.id}, Q: {question[:40]}")
+                # Failed after retries - keep the other answers
+                logger.warning(f"  Stage 2 FAILED for {paper.id}, Q: {question[:40]}")
                 all_success = False
-                break
+                continue
             
             paper.qa_pairs.append(QAPair(
                 question=question,
-                answer=answer
+                answer=_normalize_answer(answer)
             ))
             
-            print(f"  Stage 2: Answered '{question[:40]}...' for {paper.id}")
+            logger.debug(f"  Stage 2: Answered '{question[:40]}...' for {paper.id}")
         
         # Save updated paper ONLY if all succeeded
         if all_success:
-            self._save_paper(paper)
+            await self._save_paper(paper)
         else:
-            print(f"  Stage 2: Skipping save for {paper.id} due to failures")
+            logger.warning(f"  Stage 2: Skipping save for {paper.id} due to failures")
         
         return paper
     
@@ -207,8 +466,6 @@ Paper Content:
         - Reasoning mode: prefix question with "think:" to use deepseek-reasoner
         - Follow-up: provide parent_qa_id to build conversation context
         """
-        import re
-        
         # Check for reasoning mode (case-insensitive "think:" prefix)
         is_reasoning = False
         original_question = question
@@ -217,38 +474,10 @@ Paper Content:
             question = question[6:].strip()  # Remove "think:" prefix
         
         # Extract arXiv IDs from question (format: [2510.09212] or [2510.09212v1])
-        arxiv_id_pattern = r'\[(\d{4}\.\d{4,5}(?:v\d+)?)\]'
-        referenced_ids = re.findall(arxiv_id_pattern, question)
+        referenced_ids = _ARXIV_ID_RE.findall(question)
         
         # If references found, fetch and analyze them
-        referenced_papers = []
-        id_to_title = {}
-        
-        if referenced_ids:
-            print(f"🔗 Detected {len(referenced_ids)} referenced papers: {referenced_ids}")
-            
-            from fetcher import ArxivFetcher
-            fetcher = ArxivFetcher()
-            
-            for ref_id in referenced_ids:
-                try:
-                    ref_paper = await fetcher.fetch_single_paper(ref_id)
-                    
-                    if ref_paper.is_relevant is None:
-                        print(f"   📊 Analyzing {ref_id}...")
-                        await self.stage1_filter(ref_paper, config)
-                    
-                    if ref_paper.is_relevant and not ref_paper.detailed_summary:
-                        print(f"   📚 Deep analysis for {ref_id}...")
-                        await self.stage2_qa(ref_paper, config)
-                    
-                    referenced_papers.append(ref_paper)
-                    short_title = ref_paper.title[:60] + "..." if len(ref_paper.title) > 60 else ref_paper.title
-                    id_to_title[ref_id] = short_title
-                    print(f"   ✓ {ref_id}: {short_title}")
-                
-                except Exception as e:
-                    print(f"   ✗ Failed to load {ref_id}: {e}")
+        referenced_papers, id_to_title = await self._load_referenced_papers(referenced_ids, config)
         
         # Build conversation context for follow-ups
         conversation_history = []
@@ -271,30 +500,30 @@ Paper Content:
             for ref_id, title in id_to_title.items():
                 enhanced_question = enhanced_question.replace(f"[{ref_id}]", f'"{title}"')
             
+            bodies = await asyncio.gather(
+                *(self._paper_body(p, config) for p in [paper, *referenced_papers])
+            )
             context_parts = [
                 "=== CURRENT PAPER ===",
                 f"Title: {paper.title}",
-                f"Content:\n{paper.html_content or paper.abstract}",
+                f"Content:\n{bodies[0]}",
                 ""
             ]
             
-            for idx, ref_paper in enumerate(referenced_papers, 1):
+            for idx, (ref_paper, ref_body) in enumerate(zip(referenced_papers, bodies[1:]), 1):
                 context_parts.extend([
                     f"=== REFERENCE PAPER {idx} ===",
                     f"Title: {ref_paper.title}",
-                    f"Content:\n{ref_paper.html_content or ref_paper.abstract}",
+                    f"Content:\n{ref_body}",
                     ""
                 ])
             
-            cache_prefix = "\n".join(context_parts)
+            cache_prefix = _normalize_block("\n".join(context_parts))
             final_question = enhanced_question
-            cache_id = f"{paper.id}_with_refs"
+            # Canonical combined ID: same set of references -> same cache slot
+            cache_id = f"{paper.id}_with_refs_" + "_".join(id_to_title)
         else:
-            cache_prefix = f"""Paper Title: {paper.title}
-
-Paper Content:
-{paper.html_content or paper.abstract}
-"""
+            cache_prefix = await self._paper_cache_prefix(paper, config)
             final_question = question
             cache_id = paper.id
         
@@ -310,9 +539,16 @@ Paper Content:
         success = False
         
         for attempt in range(max_retries):
+            # Coalesce tiny deltas: yield at most every STREAM_FLUSH_SECONDS or
+            # STREAM_FLUSH_CHARS, so downstream does far fewer await/SSE hops
+            pending_type = None
+            pending = []
+            pending_len = 0
+            last_flush = time.perf_counter()
+            
             try:
-                full_answer = ""
-                full_thinking = ""
+                answer_parts = []
+                thinking_parts = []
                 
                 async for chunk in self._ask_question_stream(
                     cache_prefix, 
@@ -324,37 +560,130 @@ Paper Content:
                     conversation_history=conversation_history if parent_qa_id is not None else None
                 ):
                     # All chunks are now dicts: {"thinking": ...} or {"content": ...}
-                    if "thinking" in chunk:
-                        full_thinking += chunk["thinking"]
-                        yield {"type": "thinking", "chunk": chunk["thinking"]}
-                    if "content" in chunk:
-                        full_answer += chunk["content"]
-                        yield {"type": "content", "chunk": chunk["content"]}
+                    for chunk_type, text in chunk.items():
+                        if chunk_type == "thinking":
+                            thinking_parts.append(text)
+                        else:
+                            answer_parts.append(text)
+                        
+                        # Type switch: flush the other type first to keep order
+                        if pending and chunk_type != pending_type:
+                            yield {"type": pending_type, "chunk": "".join(pending)}
+                            pending, pending_len = [], 0
+                            last_flush = time.perf_counter()
+                        
+                        pending_type = chunk_type
+                        pending.append(text)
+                        pending_len += len(text)
+                        
+                        now = time.perf_counter()
+                        if pending_len >= STREAM_FLUSH_CHARS or now - last_flush >= STREAM_FLUSH_SECONDS:
+                            yield {"type": pending_type, "chunk": "".join(pending)}
+                            pending, pending_len = [], 0
+                            last_flush = now
+                
+                if pending:
+                    yield {"type": pending_type, "chunk": "".join(pending)}
                 
+                full_answer = "".join(answer_parts)
+                full_thinking = "".join(thinking_parts)
                 success = True
                 break  # Success, exit retry loop
                 
             except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"  Stream retry {attempt + 1}/{max_retries} after {wait_time}s: {e}")
-                    yield {"type": "error", "chunk": f"⚠️ Connection error, retrying in {wait_time}s...\n"}
+                # Deliver what was already received before the error message
+                if pending:
+                    yield {"type": pending_type, "chunk": "".join(pending)}
+                
+                if attempt < max_retries - 1 and _is_retryable(e):
+                    wait_time = _backoff_delay(attempt)
+                    logger.warning(f"  Stream retry {attempt + 1}/{max_retries} after {wait_time:.1f}s: {e}")
+                    yield {"type": "error", "chunk": f"⚠️ Connection error, retrying in {wait_time:.0f}s...\n"}
                     await asyncio.sleep(wait_time)
                 else:
-                    print(f"  Stream FAILED after {max_retries} attempts: {e}")
-                    yield {"type": "error", "chunk": f"❌ Failed after {max_retries} attempts: {str(e)}"}
+                    logger.warning(f"  Stream FAILED after {attempt + 1} attempts: {e}")
+                    yield {"type": "error", "chunk": f"❌ Failed after {attempt + 1} attempts: {str(e)}"}
                     return  # Don't save on failure
         
         # Save to paper ONLY if successful
         if success and (full_answer or full_thinking):
             paper.qa_pairs.append(QAPair(
                 question=original_question,
-                answer=full_answer,
+                answer=_normalize_answer(full_answer),
                 thinking=full_thinking if is_reasoning else None,
                 is_reasoning=is_reasoning,
                 parent_qa_id=parent_qa_id
             ))
-            self._save_paper(paper)
+            await self._save_paper(paper)
+            await self._writer.flush()
+    
+    async def _load_referenced_papers(self, referenced_ids: List[str], config: Config):
+        """
+        Fetch and analyze papers referenced in a question, concurrently.
+        Duplicate IDs are fetched once. Failed references are skipped.
+        Analyzed papers are kept in a small LRU for follow-up questions.
+        
+        Returns (referenced_papers, id_to_title) sorted by ID, so the combined
+        prompt prefix does not depend on mention order.
+        """
+        referenced_papers = []
+        id_to_title = {}  # Map ID to short title for replacement
+        
+        if not referenced_ids:
+            return referenced_papers, id_to_title
+        
+        unique_ids = sorted(set(ref_id.strip() for ref_id in referenced_ids if ref_id.strip()))
+        logger.info(f"🔗 Detected {len(unique_ids)} referenced papers: {unique_ids}")
+        
+        fetcher = self._get_fetcher()
+        
+        async def _prepare_ref(ref_id: str) -> Paper:
+            cached = self._ref_paper_cache.get(ref_id)
+            if cached is not None:
+                self._ref_paper_cache.move_to_end(ref_id)
+                return cached
+            
+            # Fetch paper (or load if exists)
+            ref_paper = await fetcher.fetch_single_paper(ref_id)
+            
+            # Ensure it's analyzed (Stage 1 + 2)
+            if ref_paper.is_relevant is None:
+                logger.debug(f"   📊 Analyzing {ref_id}...")
+                await self.stage1_filter(ref_paper, config)
+            
+            if ref_paper.is_relevant and not ref_paper.detailed_summary:
+                logger.debug(f"   📚 Deep analysis for {ref_id}...")
+                await self.stage2_qa(ref_paper, config)
+            
+            # Cache only fully analyzed papers; incomplete ones are retried next time
+            if ref_paper.is_relevant is not None and (not ref_paper.is_relevant or ref_paper.detailed_summary):
+                ref_paper.html_content = ""  # Saved in <id>.html.gz; don't pin full texts in the LRU
+                self._ref_paper_cache[ref_id] = ref_paper
+                self._ref_paper_cache.move_to_end(ref_id)
+                while len(self._ref_paper_cache) > REF_PAPER_CACHE_SIZE:
+                    self._ref_paper_cache.popitem(last=False)
+            
+            return ref_paper
+        
+        results = await asyncio.gather(
+            *[_prepare_ref(ref_id) for ref_id in unique_ids],
+            return_exceptions=True
+        )
+        
+        for ref_id, result in zip(unique_ids, results):
+            if isinstance(result, BaseException):
+                # Continue with available papers
+                logger.warning(f"   ✗ Failed to load {ref_id}: {result}")
+                continue
+            
+            referenced_papers.append(result)
+            
+            # Create short title (first 60 chars)
+            short_title = result.title[:60] + "..." if len(result.title) > 60 else result.title
+            id_to_title[ref_id] = short_title
+            logger.debug(f"   ✓ {ref_id}: {short_title}")
+        
+        return referenced_papers, id_to_title
     
     async def ask_custom_question(
         self,
@@ -367,46 +696,11 @@ Paper Content:
         Supports cross-paper comparison by detecting arXiv IDs in question (e.g., [2510.09212]).
         Referenced papers will be fetched and included in context.
         """
-        import re
-        
         # Extract arXiv IDs from question (format: [2510.09212] or [2510.09212v1])
-        arxiv_id_pattern = r'\[(\d{4}\.\d{4,5}(?:v\d+)?)\]'
-        referenced_ids = re.findall(arxiv_id_pattern, question)
+        referenced_ids = _ARXIV_ID_RE.findall(question)
         
         # If references found, fetch and analyze them
-        referenced_papers = []
-        id_to_title = {}  # Map ID to short title for replacement
-        
-        if referenced_ids:
-            print(f"🔗 Detected {len(referenced_ids)} referenced papers: {referenced_ids}")
-            
-            from fetcher import ArxivFetcher
-            fetcher = ArxivFetcher()
-            
-            for ref_id in referenced_ids:
-                try:
-                    # Fetch paper (or load if exists)
-                    ref_paper = await fetcher.fetch_single_paper(ref_id)
-                    
-                    # Ensure it's analyzed (Stage 1 + 2)
-                    if ref_paper.is_relevant is None:
-                        print(f"   📊 Analyzing {ref_id}...")
-                        await self.stage1_filter(ref_paper, config)
-                    
-                    if ref_paper.is_relevant and not ref_paper.detailed_summary:
-                        print(f"   📚 Deep analysis for {ref_id}...")
-                        await self.stage2_qa(ref_paper, config)
-                    
-                    referenced_papers.append(ref_paper)
-                    
-                    # Create short title (first 60 chars)
-                    short_title = ref_paper.title[:60] + "..." if len(ref_paper.title) > 60 else ref_paper.title
-                    id_to_title[ref_id] = short_title
-                    print(f"   ✓ {ref_id}: {short_title}")
-                
-                except Exception as e:
-                    print(f"   ✗ Failed to load {ref_id}: {e}")
-                    # Continue with available papers
+        referenced_papers, id_to_title = await self._load_referenced_papers(referenced_ids, config)
         
         # Build enhanced context
         if referenced_papers:
@@ -416,32 +710,31 @@ Paper Content:
                 enhanced_question = enhanced_question.replace(f"[{ref_id}]", f'"{title}"')
             
             # Build context: current paper + referenced papers
+            bodies = await asyncio.gather(
+                *(self._paper_body(p, config) for p in [paper, *referenced_papers])
+            )
             context_parts = [
                 "=== CURRENT PAPER ===",
                 f"Title: {paper.title}",
-                f"Content:\n{paper.html_content or paper.abstract}",
+                f"Content:\n{bodies[0]}",
                 ""
             ]
             
-            for idx, ref_paper in enumerate(referenced_papers, 1):
+            for idx, (ref_paper, ref_body) in enumerate(zip(referenced_papers, bodies[1:]), 1):
                 context_parts.extend([
                     f"=== REFERENCE PAPER {idx} ===",
                     f"Title: {ref_paper.title}",
-                    f"Content:\n{ref_paper.html_content or ref_paper.abstract}",
+                    f"Content:\n{ref_body}",
                     ""
                 ])
             
-            cache_prefix = "\n".join(context_parts)
+            cache_prefix = _normalize_block("\n".join(context_parts))
             final_question = enhanced_question
-            # Use combined ID for cache (disable cache for multi-paper queries to avoid confusion)
-            cache_id = f"{paper.id}_with_refs"
+            # Canonical combined ID: same set of references -> same cache slot
+            cache_id = f"{paper.id}_with_refs_" + "_".join(id_to_title)
         else:
             # Standard single-paper question
-            cache_prefix = f"""Paper Title: {paper.title}
-
-Paper Content:
-{paper.html_content or paper.abstract}
-"""
+            cache_prefix = await self._paper_cache_prefix(paper, config)
             final_question = question
             cache_id = paper.id
         
@@ -455,12 +748,81 @@ Paper Content:
         # Save to paper (save original question)
         paper.qa_pairs.append(QAPair(
             question=question,
-            answer=answer
+            answer=_normalize_answer(answer)
         ))
-        self._save_paper(paper)
+        await self._save_paper(paper)
+        await self._writer.flush()
         
         return answer
     
+    async def _paper_body(self, paper: Paper, config: Config) -> str:
+        """
+        Paper content used as LLM context (full HTML text, or abstract as fallback).
+        
+        Capped at config.max_context_chars: keeps the head (intro, method) and
+        tail (experiments, conclusion) and drops the middle. Prompt cost and
+        prefill latency grow linearly with length.
+        
+        The .html.gz is read in a worker thread and not kept on the Paper
+        (they live on in the referenced-paper LRU).
+        """
+        body = paper.html_content
+        if not body:
+            body = await asyncio.get_running_loop().run_in_executor(
+                None, read_html_body, self._writer.data_dir, paper.id
+            )
+        body = body or paper.abstract
+        cap = config.max_context_chars
+        if cap and len(body) > cap:
+            logger.debug(f"  ✂️  Truncated {paper.id} context: {len(body)} -> {cap} chars ({cap / len(body):.0%} kept)")
+            body = body[:cap * 3 // 4] + "\n\n[... truncated ...]\n\n" + body[-(cap // 4):]
+        return body
+    
+    async def _paper_cache_prefix(self, paper: Paper, config: Config) -> str:
+        """
+        Single-paper cache prefix, built once per Paper object and reused for
+        the summary, every preset question and custom questions.
+        Already normalized, so it is byte-identical on every request.
+        """
+        cache_prefix = getattr(paper, "_cache_prefix", None)
+        if not cache_prefix:
+            body = await self._paper_body(paper, config)
+            cache_prefix = _normalize_block(
+                f"Paper Title: {paper.title}\n\nPaper Content:\n{body}\n"
+            )
+            paper._cache_prefix = cache_prefix
+        return cache_prefix
+    
+    def _build_messages(
+        self,
+        cache_prefix: str,
+        question: str,
+        config: Config,
+        conversation_history: Optional[list] = None
+    ) -> list:
+        """
+        Build chat messages ordered from most to least reusable:
+        system prompt + static scaffolding -> paper block -> history -> question.
+        
+        Only the trailing messages change between questions, so everything
+        before them is a byte-identical prefix (KV cache hit).
+        cache_prefix must already be normalized (see _paper_cache_prefix).
+        """
+        messages = [
+            {"role": "system", "content": f"{config.system_prompt}\n\n{STATIC_SYSTEM_PREFIX}"},
+            {"role": "user", "content": cache_prefix},
+            {"role": "assistant", "content": PAPER_ACK},
+        ]
+        
+        # Follow-up history goes after the paper so the paper prefix stays cached
+        if conversation_history:
+            for conv in conversation_history:
+                messages.append({"role": "user", "content": f"Question: {conv['question']}"})
+                messages.append({"role": "assistant", "content": conv['answer']})
+        
+        messages.append({"role": "user", "content": f"Question: {question}"})
+        return messages
+    
     async def _ask_question_stream(
         self,
         cache_prefix: str,
@@ -482,47 +844,58 @@ Paper Content:
         For normal mode:
         - Yields text chunks directly
         """
-        # Build messages with conversation history
-        messages = [{"role": "system", "content": config.system_prompt}]
-        
-        # Add conversation history if provided (for follow-ups)
-        if conversation_history:
-            for conv in conversation_history:
-                messages.append({"role": "user", "content": f"Question: {conv['question']}"})
-                messages.append({"role": "assistant", "content": conv['answer']})
-        
-        # Add current question
-        messages.append({"role": "user", "content": f"{cache_prefix}\n\nQuestion: {question}"})
+        messages = self._build_messages(cache_prefix, question, config, conversation_history)
+        model = model or config.model
         
-        response = await self.client.chat.completions.create(
-            model=model or config.model,
-            messages=messages,
-            temperature=config.temperature,
-            max_tokens=config.max_tokens,
-            stream=True,
-        )
+        # Replay cached answers as a single chunk (thinking is not cached,
+        # so reasoning mode always goes to the API)
+        key = None if is_reasoning else LLMCache.cache_key(model, messages, config.temperature, config.max_tokens)
+        if key:
+            cached = await self.llm_cache.get(key)
+            if cached is not None:
+                yield {"content": cached}
+                return
         
-        # Stream response
-        async for chunk in response:
-            # Check if chunk has choices and delta
-            if not chunk.choices or len(chunk.choices) == 0:
-                continue
-            
-            delta = chunk.choices[0].delta
-            if not delta:
-                continue
+        # Held for the whole stream: the connection is busy until the last chunk
+        async with self._get_semaphore(config):
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
             
-            if is_reasoning:
-                # Reasoning mode: handle both reasoning_content and content
-                # Note: deepseek-reasoner may yield both in the same chunk or separately
-                if hasattr(delta, 'reasoning_content') and delta.reasoning_content:
-                    yield {"thinking": delta.reasoning_content}
-                if delta.content:
-                    yield {"content": delta.content}
-            else:
-                # Normal mode: yield as dict for consistency
-                if delta.content:
-                    yield {"content": delta.content}
+            # Stream response
+            full_answer = []
+            async for chunk in response:
+                # Final chunk carries usage (and no choices)
+                self._record_usage(getattr(chunk, "usage", None))
+                
+                # Check if chunk has choices and delta
+                if not chunk.choices or len(chunk.choices) == 0:
+                    continue
+                
+                delta = chunk.choices[0].delta
+                if not delta:
+                    continue
+                
+                if is_reasoning:
+                    # Reasoning mode: handle both reasoning_content and content
+                    # Note: deepseek-reasoner may yield both in the same chunk or separately
+                    if hasattr(delta, 'reasoning_content') and delta.reasoning_content:
+                        yield {"thinking": delta.reasoning_content}
+                    if delta.content:
+                        yield {"content": delta.content}
+                else:
+                    # Normal mode: yield as dict for consistency
+                    if delta.content:
+                        full_answer.append(delta.content)
+                        yield {"content": delta.content}
+        
+        if key and full_answer:
+            await self.llm_cache.set(key, "".join(full_answer))
     
     async def _ask_question(
         self,
@@ -536,17 +909,47 @@ Paper Content:
         
         Key: cache_prefix stays the same, only question changes.
         """
-        response = await self.client.chat.completions.create(
+        return await self._cached_completion(
+            config,
             model=config.model,
-            messages=[
-                {"role": "system", "content": config.system_prompt},
-                {"role": "user", "content": f"{cache_prefix}\n\nQuestion: {question}"}
-            ],
+            messages=self._build_messages(cache_prefix, question, config),
             temperature=config.temperature,
             max_tokens=config.max_tokens,
         )
+    
+    async def _cached_completion(
+        self,
+        config: Config,
+        model: str,
+        messages: list,
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> str:
+        """
+        Non-streaming chat completion behind the local response cache.
+        Deterministic calls are answered from disk on repeat.
+        """
+        key = LLMCache.cache_key(model, messages, temperature, max_tokens)
+        if key:
+            cached = await self.llm_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        async with self._get_semaphore(config):
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+        self._record_usage(getattr(response, "usage", None))
+        content = response.choices[0].message.content
         
-        return response.choices[0].message.content
+        if key and content:
+            await self.llm_cache.set(key, content)
+        return content
     
     async def _ask_question_with_retry(
         self,
@@ -564,19 +967,22 @@ Paper Content:
             try:
                 return await self._ask_question(cache_prefix, question, config, cache_id)
             except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"  Retry {attempt + 1}/{max_retries} after {wait_time}s: {e}")
+                if attempt < max_retries - 1 and _is_retryable(e):
+                    wait_time = _backoff_delay(attempt)
+                    logger.warning(f"  Retry {attempt + 1}/{max_retries} after {wait_time:.1f}s: {e}")
                     await asyncio.sleep(wait_time)
                 else:
-                    print(f"  FAILED after {max_retries} attempts: {e}")
+                    logger.warning(f"  FAILED after {attempt + 1} attempts: {e}")
                     return None
     
-    def _save_paper(self, paper: Paper):
-        """Save paper to JSON file"""
-        file_path = self.data_dir / f"{paper.id}.json"
-        with open(file_path, 'w') as f:
-            json.dump(paper.to_dict(), f, indent=2, ensure_ascii=False)
+    async def _save_paper(self, paper: Paper):
+        """
+        Queue paper for saving. The PaperWriter coalesces repeated saves
+        of the same paper and writes them in the background.
+        """
+        self._writer.mark_dirty(paper.id, paper.to_dict())
+        if self.on_save:
+            self.on_save(paper)
     
     async def process_papers(
         self,
@@ -585,10 +991,13 @@ Paper Content:
         skip_stage1: bool = False
     ) -> List[Paper]:
         """
-        Process multiple papers concurrently.
+        Process multiple papers as a stage 1 -> stage 2 pipeline.
         
         Stage 1: Filter all papers (fast, all concurrent)
-        Stage 2: Deep analysis only for relevant papers (batched by config.concurrent_papers)
+        Stage 2: Deep analysis for relevant papers, config.concurrent_papers workers
+        
+        Relevant papers go into a queue as soon as their stage 1 finishes,
+        so stage 2 starts without waiting for the slowest stage 1 call.
         
         Args:
             papers: List of papers to process
@@ -598,39 +1007,66 @@ Paper Content:
         if not papers:
             return papers
         
-        # Stage 1: Filter papers (unless skipped)
-        if not skip_stage1:
-            print(f"\n🔍 Stage 1: Filtering {len(papers)} papers...")
-            stage1_tasks = [self.stage1_filter(paper, config) for paper in papers]
-            papers = await asyncio.gather(*stage1_tasks)
-            
-            # Find relevant papers with score >= min_relevance_score_for_stage2
-            min_score = getattr(config, 'min_relevance_score_for_stage2', 6.0)
-            relevant_papers = [
-                p for p in papers 
-                if p.is_relevant and p.relevance_score >= min_score
-            ]
-            
-            low_score_count = len([p for p in papers if p.is_relevant and p.relevance_score < min_score])
-            print(f"✓ Found {len(relevant_papers)} papers with score >= {min_score} for deep analysis")
-            if low_score_count > 0:
-                print(f"  Skipped {low_score_count} relevant papers with score < {min_score}")
-        else:
-            # Skip Stage 1, treat all papers as relevant for Stage 2
-            print(f"\n🔍 Skipping Stage 1, directly processing {len(papers)} papers for Stage 2...")
-            relevant_papers = papers
-        
-        # Stage 2: Deep analysis for relevant papers
-        if relevant_papers:
-            concurrent = config.concurrent_papers
-            print(f"\n📚 Stage 2: Deep analysis of {len(relevant_papers)} papers (concurrent={concurrent})...")
+        cache_stats_before = dict(self.llm_cache.stats)
+        usage_before = dict(self._stats)
+        
+        concurrent = max(1, config.concurrent_papers)
+        min_score = getattr(config, 'min_relevance_score_for_stage2', 6.0)
+        # Bounded queue: stage 1 waits when stage 2 falls behind (backpressure)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrent * 2)
+        counts = {"stage2": 0, "low_score": 0}
+        
+        async def stage1_worker(paper: Paper):
+            paper = await self.stage1_filter(paper, config)
+            if paper.is_relevant and paper.relevance_score >= min_score:
+                counts["stage2"] += 1
+                await queue.put(paper)
+            elif paper.is_relevant:
+                counts["low_score"] += 1
+        
+        async def stage2_worker():
+            while True:
+                paper = await queue.get()
+                if paper is None:  # Sentinel: no more work
+                    return
+                try:
+                    await self.stage2_qa(paper, config)
+                except Exception as e:
+                    logger.warning(f"  Stage 2 error for {paper.id}: {e}")
+        
+        workers = [asyncio.create_task(stage2_worker()) for _ in range(concurrent)]
+        
+        try:
+            if not skip_stage1:
+                logger.info(f"🔍 Stage 1: Filtering {len(papers)} papers (stage 2 concurrent={concurrent})...")
+                await asyncio.gather(*[stage1_worker(paper) for paper in papers])
+                
+                logger.info(f"✓ Found {counts['stage2']} papers with score >= {min_score} for deep analysis")
+                if counts["low_score"] > 0:
+                    logger.info(f"  Skipped {counts['low_score']} relevant papers with score < {min_score}")
+            else:
+                # Skip Stage 1, treat all papers as relevant for Stage 2
+                logger.info(f"📚 Skipping Stage 1, deep analysis of {len(papers)} papers (concurrent={concurrent})...")
+                for paper in papers:
+                    await queue.put(paper)
             
-            # Process in batches to control concurrency
-            for i in range(0, len(relevant_papers), concurrent):
-                batch = relevant_papers[i:i + concurrent]
-                print(f"   Processing batch {i//concurrent + 1}/{(len(relevant_papers) + concurrent - 1)//concurrent} ({len(batch)} papers)")
-                stage2_tasks = [self.stage2_qa(paper, config) for paper in batch]
-                await asyncio.gather(*stage2_tasks)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await self._writer.flush()
+        
+        hits = self.llm_cache.stats["hits"] - cache_stats_before["hits"]
+        misses = self.llm_cache.stats["misses"] - cache_stats_before["misses"]
+        logger.info(f"💾 LLM cache: {hits} hits, {misses} misses")
+        
+        hit_tokens = self._stats["cache_hit"] - usage_before["cache_hit"]
+        miss_tokens = self._stats["cache_miss"] - usage_before["cache_miss"]
+        if hit_tokens + miss_tokens > 0:
+            hit_rate = hit_tokens / (hit_tokens + miss_tokens)
+            logger.info(f"🎯 DeepSeek prefix cache: {hit_tokens} hit / {miss_tokens} miss tokens ({hit_rate:.1%} hit rate)")
         
         return papers
 
@@ -647,17 +1083,18 @@ async def analyze_new_papers():
     analyzer = DeepSeekAnalyzer()
     
     # Find unanalyzed papers (is_relevant is None)
-    all_papers = fetcher.list_papers(limit=1000)
+    all_papers = await fetcher.list_papers_async(limit=1000)
     unanalyzed = [p for p in all_papers if p.is_relevant is None]
     
     if unanalyzed:
-        print(f"📊 Analyzing {len(unanalyzed)} unanalyzed papers...")
+        logger.info(f"📊 Analyzing {len(unanalyzed)} unanalyzed papers...")
         await analyzer.process_papers(unanalyzed, config)
     else:
-        print("✓ All papers already analyzed")
+        logger.info("✓ All papers already analyzed")
 
 
 if __name__ == "__main__":
     # Test analyzer
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     asyncio.run(analyze_new_papers())
 
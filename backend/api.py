@@ -11,72 +11,206 @@ Endpoints:
 """
 
 import asyncio
+import dataclasses
+import hashlib
+import heapq
+import importlib.util
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.requests import Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, Response
+import msgspec
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
+import uvicorn
 from typing import List, Optional
 from pathlib import Path
 from datetime import datetime
 import json
 
-from models import Paper, Config, QAPair
+from models import Paper, Config, QAPair, compile_keyword_matcher
 from fetcher import ArxivFetcher
 from analyzer import DeepSeekAnalyzer
 from default_config import DEFAULT_CONFIG
 from exporter import MarkdownExporter
+from paper_cache import PaperCache, timeline_item
+import github_uploader
 import glob
+import itertools
+import logging
+import mimetypes
+import stat
+import logging.handlers
 import os
+import queue
+import re
+import signal
+import sys
+import time
+import traceback
+
+try:
+    import orjson  # Optional C JSON codec for large list responses
+except ImportError:
+    orjson = None
+
+
+def _json_bytes(data) -> bytes:
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+# Verbose per-chunk stream logging (STREAM_DEBUG=1)
+_DEBUG = os.getenv("STREAM_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Search query that is a bare arXiv ID: 2510.09212 or 2510.09212v1
+_ARXIV_ID_RE = re.compile(r'^\d{4}\.\d{4,5}(v\d+)?$')
+
+
+def _timeline_item(p: Paper) -> dict:
+    """
+    Simplified paper data for timeline / search results.
+    Cache entries carry a prebuilt dict (shared - copy before modifying);
+    full papers loaded from disk build a fresh one.
+    """
+    item = getattr(p, "timeline_dict", None)
+    return item if item is not None else timeline_item(p)
+
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    """
+    Route log records through a queue: handlers on the event loop only enqueue,
+    a background thread does the actual stderr writes.
+    Level comes from LOG_LEVEL (default INFO; DEBUG shows per-paper progress
+    and every exported markdown file).
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    for name in ("analyzer", "exporter"):
+        module_logger = logging.getLogger(name)
+        module_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        module_logger.addHandler(queue_handler)
+        module_logger.propagate = False
+    
+    listener.start()
+    return listener
+
+
+log_listener = _setup_logging()
+
+class TaskPool:
+    """
+    Runs at most `size` background jobs at once; extra jobs wait in a bounded
+    queue and are dropped when it is full (protects memory and API quota).
+    Jobs are submitted as (coroutine function, args) so dropped ones never start.
+    """
+    
+    def __init__(self, size: int = 4, max_pending: int = 100):
+        self.size = size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._workers: List[asyncio.Task] = []
+    
+    def submit(self, fn, *args) -> bool:
+        """Queue fn(*args); returns False if the pool is saturated"""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.size)]
+        try:
+            self._queue.put_nowait((fn, args))
+            return True
+        except asyncio.QueueFull:
+            print(f"⚠️  Task pool full, dropping {getattr(fn, '__name__', fn)}")
+            return False
+    
+    async def _worker(self):
+        while True:
+            fn, args = await self._queue.get()
+            try:
+                await fn(*args)
+            except Exception as e:
+                print(f"✗ Background job {getattr(fn, '__name__', fn)} failed: {e}")
+    
+    async def aclose(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
 
 
 # Background task reference
 background_task = None
+
+# Set by POST /fetch/wake (webhook / external cron): ends the fetch-interval sleep early
+new_papers_event = asyncio.Event()
+
+# Caps concurrent question answering (each holds an upstream DeepSeek stream)
+analyzer_sem = asyncio.Semaphore(10)
+
+# Bounded pool for on-demand analysis (/search auto-analysis, /fetch)
+analysis_pool = TaskPool(size=4)
+
 # Single run mode: if True, run once and exit
 single_run_mode = os.getenv("SINGLE_RUN", "").lower() in ("1", "true", "yes")
 single_run_mode = os.getenv("SINGLE_RUN", "").lower() in ("1", "true", "yes")
 
 
-def cleanup_papers():
+def _paper_file_paths(papers_dir: Path) -> List[str]:
+    with os.scandir(papers_dir) as entries:
+        return [e.path for e in entries if e.name.endswith((".json", ".html.gz")) and e.is_file()]
+
+
+async def cleanup_papers_async() -> int:
     """
-    Clean up paper JSON files from data/papers directory.
+    Clean up paper files (JSON metadata + .html.gz text) from data/papers, off the event loop,
+    then drop the now-stale paper cache.
     Called after successful markdown export to prevent file accumulation.
     
     Returns:
         int: Number of files cleaned up
     """
+    papers_dir = Path("data/papers")
     try:
-        papers_dir = Path("data/papers")
         if not papers_dir.exists():
             return 0
         
-        # Count files before cleanup
-        paper_files = list(papers_dir.glob("*.json"))
-        count = len(paper_files)
+        # Queued analyzer saves land first, so none of them recreates a paper after the cleanup
+        await analyzer.flush_saves()
         
-        if count == 0:
+        loop = asyncio.get_running_loop()
+        paper_files = await loop.run_in_executor(None, _paper_file_paths, papers_dir)
+        if not paper_files:
             return 0
         
-        # Delete all JSON files
+        # Only the listed files: in-flight temp files of concurrent writers stay untouched.
+        # Unlinks spread over the default thread pool instead of one after another
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, os.unlink, path) for path in paper_files),
+            return_exceptions=True
+        )
         deleted_count = 0
-        for paper_file in paper_files:
-            try:
-                paper_file.unlink()
+        for path, error in zip(paper_files, results):
+            if isinstance(error, Exception):
+                print(f"⚠️  Failed to delete {os.path.basename(path)}: {error}")
+            else:
                 deleted_count += 1
-            except Exception as e:
-                print(f"⚠️  Failed to delete {paper_file.name}: {e}")
         
         print(f"🧹 Cleaned up {deleted_count} paper files from data/papers/")
-        return deleted_count
     except Exception as e:
         print(f"⚠️  Cleanup failed: {e}")
-        import traceback
         traceback.print_exc()
         return 0
+    
+    if deleted_count > 0:
+        paper_cache.clear()
+    return deleted_count
 
 
 @asynccontextmanager
@@ -95,6 +229,12 @@ async def lifespan(app: FastAPI):
         config.save(config_path)
         print(f"✓ Created default config at {config_path}")
     
+    # Papers saved before the HTML text moved out of the JSON (nothing else writes yet)
+    await asyncio.get_running_loop().run_in_executor(None, fetcher.migrate_inline_html)
+    
+    # Load all papers into memory once; saves keep the cache current
+    await paper_cache.reload_all()
+    
     # Start background fetcher (pending analysis handled there)
     global background_task
     background_task = asyncio.create_task(background_fetcher())
@@ -110,6 +250,11 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
     print("👋 Background fetcher stopped")
+    await analysis_pool.aclose()
+    await analyzer.aclose()
+    await fetcher.aclose()
+    await github_uploader.aclose()
+    log_listener.stop()  # Drain queued log records
 
 
 app = FastAPI(title="arXiv Paper Fetcher", lifespan=lifespan)
@@ -123,59 +268,111 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# GZip compression - BUT exclude streaming endpoints to prevent buffering
-# FastAPI's GZipMiddleware buffers StreamingResponse, which breaks SSE real-time delivery
-# Solution: Only apply GZip to non-streaming endpoints
-@app.middleware("http")
-async def selective_gzip_middleware(request: Request, call_next):
-    """Skip GZip for streaming endpoints to prevent buffering"""
-    # Skip compression for streaming endpoints (critical for real-time SSE)
-    if "/ask_stream" in str(request.url.path):
-        response = await call_next(request)
-        return response
-    
-    # For other endpoints, use standard GZip middleware behavior
-    # But we need to apply it properly - use the middleware's dispatch method
-    # Actually, the simplest: just bypass GZip for streaming, let others go through
-    # We'll apply GZip via a wrapper that checks the response type
+# GZip for JSON/static responses. SSE must not go through it: the compressor
+# buffers the body and breaks real-time delivery, so streaming paths bypass it
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes streaming endpoints through untouched"""
     
-    response = await call_next(request)
-    
-    # Don't compress StreamingResponse - they need immediate delivery
-    if isinstance(response, StreamingResponse):
-        return response
-    
-    # For other responses, let GZip middleware handle it if configured
-    # Since we're not using global GZipMiddleware, we rely on reverse proxy (nginx) for compression
-    # The key fix: streaming endpoints never go through GZip
-    return response
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/ask_stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
-# Note: We don't add global GZipMiddleware because it buffers StreamingResponse
-# Compression for non-streaming endpoints can be handled by reverse proxy (nginx)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1000, compresslevel=5)
 
 # Global instances
 fetcher = ArxivFetcher()
-analyzer = DeepSeekAnalyzer()
+paper_cache = PaperCache(fetcher)  # In-memory timeline, filled on startup
+fetcher.on_save = paper_cache.upsert
+analyzer = DeepSeekAnalyzer(fetcher=fetcher, on_save=paper_cache.upsert)
 config_path = Path("data/config.json")
 
+# Parsed config, keyed by file mtime in integer ns: (st_mtime_ns, Config)
+_config_cache: Optional[tuple] = None
+
+
+def get_config_cached() -> Config:
+    """
+    Return the parsed config, re-reading data/config.json only when its mtime changes.
+    The returned object is shared - copy it (dataclasses.replace) before modifying.
+    """
+    global _config_cache
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return Config()  # Same fallback as Config.load
+    
+    if _config_cache and _config_cache[0] == mtime:
+        return _config_cache[1]
+    
+    config = Config.load(config_path)
+    _config_cache = (mtime, config)
+    return config
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with browser caching and precompressed assets.
+    - ?v=<hash> URLs (written by build_static.py) never change: cached as immutable
+    - anything else must revalidate (ETag / 304)
+    - serves the build-time `<file>.gz` when the client accepts gzip,
+      so the GZip middleware doesn't recompress on every request
+    """
+    
+    async def get_response(self, path: str, scope) -> Response:
+        response = None
+        if scope["method"] in ("GET", "HEAD") and "gzip" in Headers(scope=scope).get("accept-encoding", ""):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        # Body depends on Accept-Encoding whenever a .gz sibling may exist
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+    
+    async def _precompressed_response(self, path: str, scope) -> Optional[Response]:
+        try:
+            full_path, stat_result = await asyncio.get_running_loop().run_in_executor(None, self.lookup_path, path + ".gz")
+        except OSError:
+            return None
+        if not (stat_result and stat.S_ISREG(stat_result.st_mode)):
+            return None
+        
+        response = self.file_response(full_path, stat_result, scope)
+        # Type of the original file, not application/gzip
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        response.headers["Content-Type"] = media_type
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+
 # Serve frontend static files FIRST (before other routes)
 # Try frontend_dist first (built assets), fallback to frontend (source)
 frontend_dist = Path(__file__).parent.parent / "frontend_dist"
 frontend_path = Path(__file__).parent.parent / "frontend"
 if frontend_dist.exists():
-    app.mount("/static", StaticFiles(directory=str(frontend_dist)), name="static")
+    app.mount("/static", CachedStaticFiles(directory=str(frontend_dist)), name="static")
     frontend_path = frontend_dist  # Use dist for serving index.html too
 elif frontend_path.exists():
-    app.mount("/static", StaticFiles(directory=str(frontend_path)), name="static")
+    app.mount("/static", CachedStaticFiles(directory=str(frontend_path)), name="static")
 
 
 # Request/Response models
-class AskQuestionRequest(BaseModel):
+# msgspec Structs decoded straight from the body bytes (see parse_body)
+class AskQuestionRequest(msgspec.Struct):
     question: str
     parent_qa_id: Optional[int] = None  # For follow-up questions
 
 
-class UpdateConfigRequest(BaseModel):
+class UpdateConfigRequest(msgspec.Struct):
     filter_keywords: Optional[List[str]] = None
     negative_keywords: Optional[List[str]] = None
     preset_questions: Optional[List[str]] = None
@@ -187,13 +384,34 @@ class UpdateConfigRequest(BaseModel):
     max_tokens: Optional[int] = None
     concurrent_papers: Optional[int] = None
     min_relevance_score_for_stage2: Optional[float] = None
+    max_concurrent_requests: Optional[int] = None
+    max_context_chars: Optional[int] = None
+    enable_stage1_fastpath: Optional[bool] = None
+    strict_stage1: Optional[bool] = None
+    stage1_max_preview_chars: Optional[int] = None
 
 
-class UpdateRelevanceRequest(BaseModel):
+class UpdateRelevanceRequest(msgspec.Struct):
     is_relevant: bool
     relevance_score: float
 
 
+def parse_body(model: type):
+    """
+    FastAPI dependency: decode the JSON request body into `model`.
+    Invalid JSON or wrong field types -> 422, like FastAPI's own validation.
+    """
+    decoder = msgspec.json.Decoder(model)
+    
+    async def parse(request: Request):
+        try:
+            return decoder.decode(await request.body())
+        except (msgspec.ValidationError, msgspec.DecodeError) as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    
+    return parse
+
+
 # ============ Frontend & Endpoints ============
 
 @app.get("/", include_in_schema=False)
@@ -203,10 +421,12 @@ async def serve_frontend():
     frontend_dist = Path(__file__).parent.parent / "frontend_dist"
     frontend_source = Path(__file__).parent.parent / "frontend"
     
+    # index.html carries the asset hashes: always revalidate it
+    headers = {"Cache-Control": "no-cache"}
     if frontend_dist.exists() and (frontend_dist / "index.html").exists():
-        return FileResponse(str(frontend_dist / "index.html"))
+        return FileResponse(str(frontend_dist / "index.html"), headers=headers)
     elif frontend_source.exists() and (frontend_source / "index.html").exists():
-        return FileResponse(str(frontend_source / "index.html"))
+        return FileResponse(str(frontend_source / "index.html"), headers=headers)
     return {"message": "Frontend not found. Please check frontend directory."}
 
 
@@ -216,74 +436,74 @@ async def health_check():
     return {"message": "arXiv Paper Fetcher API", "status": "running"}
 
 
+# /papers response bytes by query params, valid for one paper_cache.version
+TIMELINE_CACHE_SIZE = 128
+_timeline_cache: dict = {}
+_timeline_cache_version = -1
+
+
+def _reset_timeline_cache():
+    global _timeline_cache_version
+    _timeline_cache.clear()
+    _timeline_cache_version = paper_cache.version
+
+
+# Per-process salt: cache versions restart on every boot
+_ETAG_SALT = os.urandom(4).hex()
+
+
+def _make_etag(*parts) -> str:
+    raw = ":".join(str(p) for p in (_ETAG_SALT, *parts))
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=8).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        candidates.append(tag[2:] if tag.startswith("W/") else tag)  # Weak match (str.removeprefix is 3.9+)
+    return etag in candidates or "*" in candidates
+
+
 @app.get("/papers", response_model=List[dict])
-async def list_papers(skip: int = 0, limit: int = 20, sort_by: str = "relevance", keyword: str = None, starred_only: str = "false"):
+async def list_papers(request: Request, skip: int = 0, limit: int = 20, sort_by: str = "relevance", keyword: str = None, starred_only: str = "false"):
     """
     List papers for timeline.
     sort_by: 'relevance' (default), 'latest'
     keyword: filter by keyword
     starred_only: 'true' to return only starred papers, 'false' to exclude starred papers
+    Returns 304 when If-None-Match matches (nothing changed since the last poll).
     """
-    # When loading starred papers, we need ALL papers, not just the latest 1000
-    # Otherwise old starred papers might be missed
-    starred_only_bool = starred_only.lower() == 'true'
-    if starred_only_bool:
-        # Load all papers when fetching starred papers
-        papers = fetcher.list_papers(skip=0, limit=0)  # limit=0 means load all
-    else:
-        # For normal timeline, only load recent papers
-        papers = fetcher.list_papers(skip=0, limit=1000)
+    etag = _make_etag(paper_cache.version, sort_by, skip, limit, keyword, starred_only.lower())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # Cache, but always revalidate
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
     
-    # Filter out hidden papers first
-    papers = [p for p in papers if not p.is_hidden]
+    # Serialized pages are cached until the paper cache changes
+    cache_key = (sort_by, keyword, starred_only.lower(), skip, limit)
+    if _timeline_cache_version != paper_cache.version:
+        _reset_timeline_cache()
+    payload = _timeline_cache.get(cache_key)
     
-    # Filter by starred status
-    if starred_only_bool:
-        papers = [p for p in papers if p.is_starred]
-    else:
-        # For normal timeline, exclude starred papers (they're shown separately)
-        papers = [p for p in papers if not p.is_starred]
-    
-    # Filter by keyword if provided
-    if keyword:
-        papers = [p for p in papers if keyword.lower() in ' '.join(p.extracted_keywords).lower()]
-    
-    # Sort by relevance or latest
-    if sort_by == "relevance":
-        # Multi-level sorting: 
-        # 1. Has deep analysis (True > False) 
-        # 2. Relevance score (high > low)
-        papers.sort(key=lambda p: (
-            bool(p.detailed_summary and p.detailed_summary.strip()),  # Has deep analysis
-            p.relevance_score
-        ), reverse=True)
-    elif sort_by == "latest":
-        papers.sort(key=lambda p: p.published_date or p.created_at, reverse=True)
-    
-    # Paginate
-    papers = papers[skip:skip + limit]
-    
-    # Return simplified data for timeline
-    return [
-        {
-            "id": p.id,
-            "title": p.title,
-            "authors": p.authors,
-            "abstract": p.abstract[:200] + "..." if len(p.abstract) > 200 else p.abstract,
-            "url": p.url,
-            "is_relevant": p.is_relevant,
-            "relevance_score": p.relevance_score,
-            "extracted_keywords": p.extracted_keywords,
-            "one_line_summary": p.one_line_summary,
-            "published_date": p.published_date,
-            "is_starred": p.is_starred,
-            "is_hidden": p.is_hidden,
-            "created_at": p.created_at,
-            "has_qa": len(p.qa_pairs) > 0,
-            "detailed_summary": p.detailed_summary,  # For Stage 2 status detection
-        }
-        for p in papers
-    ]
+    if payload is None:
+        # Hidden/starred/keyword filtering and sorting come from the in-memory cache
+        starred_only_bool = starred_only.lower() == 'true'
+        # Paginated inside the cache: walks only as far as skip + limit
+        papers = paper_cache.snapshot(
+            sort_by=sort_by, starred_only=starred_only_bool, keyword=keyword, skip=skip, limit=limit
+        )
+        
+        # Return simplified data for timeline
+        payload = _json_bytes([_timeline_item(p) for p in papers])
+        if len(_timeline_cache) >= TIMELINE_CACHE_SIZE:
+            _timeline_cache.pop(next(iter(_timeline_cache)))  # Drop oldest entry
+        _timeline_cache[cache_key] = payload
+    
+    return Response(content=payload, media_type="application/json", headers=headers)
 
 
 @app.get("/papers/{paper_id}", response_model=dict)
@@ -299,16 +519,17 @@ async def get_paper(paper_id: str):
 
 
 @app.post("/papers/{paper_id}/ask")
-async def ask_question(paper_id: str, request: AskQuestionRequest):
+async def ask_question(paper_id: str, request: AskQuestionRequest = Depends(parse_body(AskQuestionRequest))):
     """
     Ask a custom question about a paper.
     Uses KV cache for efficiency.
     """
     try:
         paper = fetcher.load_paper(paper_id)
-        config = Config.load(config_path)
+        config = get_config_cached()
         
-        answer = await analyzer.ask_custom_question(paper, request.question, config)
+        async with analyzer_sem:
+            answer = await analyzer.ask_custom_question(paper, request.question, config)
         
         return {
             "question": request.question,
@@ -323,7 +544,7 @@ async def ask_question(paper_id: str, request: AskQuestionRequest):
 
 
 @app.post("/papers/{paper_id}/ask_stream")
-async def ask_question_stream(paper_id: str, request: AskQuestionRequest):
+async def ask_question_stream(paper_id: str, request: AskQuestionRequest = Depends(parse_body(AskQuestionRequest))):
     """
     Ask a custom question about a paper with streaming response.
     Uses Server-Sent Events (SSE) for real-time streaming.
@@ -334,7 +555,7 @@ async def ask_question_stream(paper_id: str, request: AskQuestionRequest):
     """
     try:
         paper = fetcher.load_paper(paper_id)
-        config = Config.load(config_path)
+        config = get_config_cached()
         
         async def event_generator():
             """Generate SSE events with streamed answer"""
@@ -343,46 +564,38 @@ async def ask_question_stream(paper_id: str, request: AskQuestionRequest):
                 chunk_count = 0
                 last_yield_time = None
                 
-                async for chunk_data in analyzer.ask_custom_question_stream(
-                    paper, 
-                    request.question, 
-                    config,
-                    parent_qa_id=request.parent_qa_id
-                ):
-                    # chunk_data is now a dict: {"type": "thinking"/"content", "chunk": "..."}
-                    chunk_count += 1
-                    
-                    if chunk_count <= 5 or chunk_count % 10 == 0:
-                        import time
-                        current_time = time.time()
-                        time_since_last = current_time - last_yield_time if last_yield_time else 0
-                        print(f"[Stream] Chunk {chunk_count}: type={chunk_data.get('type')}, len={len(chunk_data.get('chunk', ''))}, time_since_last={time_since_last:.3f}s")
-                        last_yield_time = current_time
-                    
-                    # Yield immediately - don't buffer
-                    sse_data = f"data: {json.dumps(chunk_data)}\n\n"
-                    yield sse_data
+                async with analyzer_sem:
+                    async for chunk_data in analyzer.ask_custom_question_stream(
+                        paper, 
+                        request.question, 
+                        config,
+                        parent_qa_id=request.parent_qa_id
+                    ):
+                        # chunk_data is now a dict: {"type": "thinking"/"content", "chunk": "..."}
+                        chunk_count += 1
+                        
+                        if _DEBUG and (chunk_count <= 5 or chunk_count % 10 == 0):
+                            current_time = time.monotonic()
+                            time_since_last = current_time - last_yield_time if last_yield_time else 0
+                            print(f"[Stream] Chunk {chunk_count}: type={chunk_data.get('type')}, len={len(chunk_data.get('chunk', ''))}, time_since_last={time_since_last:.3f}s")
+                            last_yield_time = current_time
+                        
+                        # Yield immediately - don't buffer
+                        yield ServerSentEvent(data=_json_bytes(chunk_data).decode())
                 
                 print(f"[Stream] Stream complete, total chunks: {chunk_count}")
                 # Send completion event
-                yield f"data: {json.dumps({'done': True})}\n\n"
+                yield ServerSentEvent(data=_json_bytes({'done': True}).decode())
             
             except Exception as e:
-                import traceback
                 error_msg = f"Stream error: {str(e)}\n{traceback.format_exc()}"
                 print(f"[Stream] ERROR: {error_msg}")
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                yield ServerSentEvent(data=_json_bytes({'error': str(e)}).decode())
         
-        return StreamingResponse(
-            event_generator(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",  # Disable nginx/proxy buffering
-                "Transfer-Encoding": "chunked",  # Explicit chunked encoding
-            }
-        )
+        # Handles no-cache / X-Accel-Buffering headers, keep-alive pings on long
+        # generations, and cancels the generator when the client disconnects.
+        # sep="\n": the frontend splits frames on "\n\n"
+        return EventSourceResponse(event_generator(), sep="\n")
     
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Paper not found")
@@ -391,16 +604,23 @@ async def ask_question_stream(paper_id: str, request: AskQuestionRequest):
 
 
 @app.get("/config")
-async def get_config():
-    """Get current configuration"""
-    config = Config.load(config_path)
-    return config.to_dict()
+async def get_config(request: Request):
+    """Get current configuration (ETag keyed on the config file mtime)"""
+    config = get_config_cached()
+    if not _config_cache or _config_cache[1] is not config:
+        return config.to_dict()  # No config file yet: defaults, no ETag
+    
+    etag = _make_etag("config", _config_cache[0])
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_json_bytes(config.to_dict()), media_type="application/json", headers=headers)
 
 
 @app.put("/config")
-async def update_config(request: UpdateConfigRequest):
+async def update_config(request: UpdateConfigRequest = Depends(parse_body(UpdateConfigRequest))):
     """Update configuration - supports all config options"""
-    config = Config.load(config_path)
+    config = dataclasses.replace(get_config_cached())  # Copy: the cached one is shared
     old_negative_keywords = set(config.negative_keywords or [])
     
     # Update all provided fields
@@ -426,14 +646,26 @@ async def update_config(request: UpdateConfigRequest):
         config.concurrent_papers = max(1, min(50, request.concurrent_papers))  # 1-50 range
     if request.min_relevance_score_for_stage2 is not None:
         config.min_relevance_score_for_stage2 = max(0.0, min(10.0, request.min_relevance_score_for_stage2))  # 0-10 range
+    if request.max_concurrent_requests is not None:
+        config.max_concurrent_requests = max(1, min(64, request.max_concurrent_requests))  # 1-64 range
+    if request.max_context_chars is not None:
+        config.max_context_chars = max(0, request.max_context_chars)  # 0 = no limit
+    if request.enable_stage1_fastpath is not None:
+        config.enable_stage1_fastpath = request.enable_stage1_fastpath
+    if request.strict_stage1 is not None:
+        config.strict_stage1 = request.strict_stage1
+    if request.stage1_max_preview_chars is not None:
+        config.stage1_max_preview_chars = max(0, request.stage1_max_preview_chars)  # 0 = no limit
     
     config.save(config_path)
+    global _config_cache
+    _config_cache = (config_path.stat().st_mtime_ns, config)
     
     # Check if negative keywords changed
     new_negative_keywords = set(config.negative_keywords or [])
     if new_negative_keywords != old_negative_keywords:
-        # Trigger background task to recheck papers with new negative keywords
-        asyncio.create_task(recheck_negative_keywords(config, new_negative_keywords))
+        # Recheck papers with new negative keywords in background (coalesced across rapid edits)
+        schedule_negative_keyword_recheck(config, new_negative_keywords)
         return {
             "message": "Config updated. Re-checking papers with new negative keywords in background...",
             "config": config.to_dict()
@@ -448,12 +680,9 @@ async def search_papers(q: str, limit: int = 50):
     Search papers by keyword, full-text, or arXiv ID.
     If query looks like arXiv ID (e.g., 2510.09212), fetch if not exists.
     """
-    import re
-    
     # Check if query is an arXiv ID (format: YYMM.NNNNN or YYMM.NNNNNvN)
-    arxiv_id_pattern = r'^\d{4}\.\d{4,5}(v\d+)?$'
-    if re.match(arxiv_id_pattern, q.strip()):
-        arxiv_id = q.strip()
+    arxiv_id = q.strip()
+    if _ARXIV_ID_RE.match(arxiv_id):
         print(f"🔍 Detected arXiv ID: {arxiv_id}")
         
         try:
@@ -461,7 +690,7 @@ async def search_papers(q: str, limit: int = 50):
             paper = await fetcher.fetch_single_paper(arxiv_id)
             
             # Trigger analysis in background
-            config = Config.load(config_path)
+            config = get_config_cached()
             
             # Check if Stage 1 is needed (is_relevant is None)
             needs_stage1 = paper.is_relevant is None
@@ -477,76 +706,26 @@ async def search_papers(q: str, limit: int = 50):
             if needs_stage1 or needs_stage2:
                 if needs_stage1:
                     print(f"📊 Started background Stage 1+2 analysis for {arxiv_id}")
-                    asyncio.create_task(analyzer.process_papers([paper], config))
+                    analysis_pool.submit(analyzer.process_papers, [paper], config)
                 else:
                     # Only Stage 2 needed
                     print(f"📚 Started background Stage 2 analysis for {arxiv_id}")
-                    asyncio.create_task(analyzer.process_papers([paper], config, skip_stage1=True))
+                    analysis_pool.submit(analyzer.process_papers, [paper], config, True)  # skip_stage1
             
             # Return the paper
-            return [{
-                "id": paper.id,
-                "title": paper.title,
-                "authors": paper.authors,
-                "abstract": paper.abstract[:200] + "..." if len(paper.abstract) > 200 else paper.abstract,
-                "url": paper.url,
-                "is_relevant": paper.is_relevant,
-                "relevance_score": paper.relevance_score,
-                "extracted_keywords": paper.extracted_keywords,
-                "one_line_summary": paper.one_line_summary,
-                "published_date": paper.published_date,
-                "is_starred": paper.is_starred,
-                "is_hidden": paper.is_hidden,
-                "created_at": paper.created_at,
-                "has_qa": len(paper.qa_pairs) > 0,
-                "detailed_summary": paper.detailed_summary,
-                "search_score": 1000,  # High score for direct ID match
-            }]
+            # High score for direct ID match
+            return [{**_timeline_item(paper), "search_score": 1000}]
         
         except Exception as e:
             print(f"✗ Failed to fetch arXiv paper {arxiv_id}: {e}")
             raise HTTPException(status_code=404, detail=f"Paper {arxiv_id} not found on arXiv")
     
-    # Normal keyword search
-    papers = fetcher.list_papers(limit=1000)
-    q_lower = q.lower()
+    # Normal keyword search: inverted index narrows candidates, exact substring match verifies
+    # Top `limit` by score (nlargest == stable sort + slice), dicts built only for those
+    matches = heapq.nlargest(limit, paper_cache.search(q), key=lambda m: m[1])
     
-    results = []
-    for paper in papers:
-        # Skip hidden papers
-        if paper.is_hidden:
-            continue
-            
-        # Search in title, abstract, keywords, summary
-        searchable = (
-            f"{paper.title} {paper.abstract} "
-            f"{' '.join(paper.extracted_keywords)} {paper.one_line_summary}"
-        ).lower()
-        
-        if q_lower in searchable:
-            results.append({
-                "id": paper.id,
-                "title": paper.title,
-                "authors": paper.authors,
-                "abstract": paper.abstract[:200] + "..." if len(paper.abstract) > 200 else paper.abstract,
-                "url": paper.url,
-                "is_relevant": paper.is_relevant,
-                "relevance_score": paper.relevance_score,
-                "extracted_keywords": paper.extracted_keywords,
-                "one_line_summary": paper.one_line_summary,
-                "published_date": paper.published_date,
-                "is_starred": paper.is_starred,
-                "is_hidden": paper.is_hidden,
-                "created_at": paper.created_at,
-                "has_qa": len(paper.qa_pairs) > 0,
-                "detailed_summary": paper.detailed_summary,  # For Stage 2 status detection
-                "search_score": searchable.count(q_lower),  # Simple scoring
-            })
-    
-    # Sort by search score
-    results.sort(key=lambda x: x["search_score"], reverse=True)
-    
-    return results[:limit]
+    # search_score = occurrence count
+    return [{**_timeline_item(paper), "search_score": score} for paper, score in matches]
 
 
 @app.post("/fetch")
@@ -557,7 +736,7 @@ async def trigger_fetch():
     """
     async def fetch_and_analyze():
         try:
-            config = Config.load(config_path)
+            config = get_config_cached()
             print(f"\n📡 Manual fetch triggered...")
             papers = await fetcher.fetch_latest(config.max_papers_per_fetch, config=config)
             if papers:
@@ -568,15 +747,25 @@ async def trigger_fetch():
                 print(f"✓ No new papers found")
         except Exception as e:
             print(f"✗ Manual fetch error: {e}")
-            import traceback
             traceback.print_exc()
     
-    # Start task in background
-    asyncio.create_task(fetch_and_analyze())
+    # Start task in background (bounded pool)
+    if not analysis_pool.submit(fetch_and_analyze):
+        raise HTTPException(status_code=503, detail="Too many background jobs, try again later")
     
     return {"message": "Fetch triggered", "status": "running"}
 
 
+@app.post("/fetch/wake")
+async def wake_fetcher():
+    """
+    Signal that new papers are available: the background fetcher runs its
+    next cycle now instead of waiting out fetch_interval.
+    """
+    new_papers_event.set()
+    return {"message": "Background fetcher woken", "status": "scheduled"}
+
+
 @app.post("/papers/{paper_id}/hide")
 async def hide_paper(paper_id: str):
     """Hide a paper"""
@@ -614,7 +803,7 @@ async def star_paper(paper_id: str):
 
 
 @app.post("/papers/{paper_id}/update_relevance")
-async def update_relevance(paper_id: str, request: UpdateRelevanceRequest):
+async def update_relevance(paper_id: str, request: UpdateRelevanceRequest = Depends(parse_body(UpdateRelevanceRequest))):
     """Update paper relevance status and score manually"""
     try:
         paper = fetcher.load_paper(paper_id)
@@ -634,13 +823,14 @@ async def update_relevance(paper_id: str, request: UpdateRelevanceRequest):
 @app.get("/stats")
 async def get_stats():
     """Get system statistics"""
-    papers = fetcher.list_papers(limit=10000)
-    
-    total = len(papers)
-    analyzed = len([p for p in papers if p.is_relevant is not None])
-    relevant = len([p for p in papers if p.is_relevant])
-    starred = len([p for p in papers if p.is_starred])
-    hidden = len([p for p in papers if p.is_hidden])
+    # Single pass over the cache, no intermediate lists
+    total = len(paper_cache)
+    analyzed = relevant = starred = hidden = 0
+    for p in paper_cache.all():
+        analyzed += p.is_relevant is not None
+        relevant += bool(p.is_relevant)
+        starred += bool(p.is_starred)
+        hidden += bool(p.is_hidden)
     
     return {
         "total_papers": total,
@@ -653,12 +843,18 @@ async def get_stats():
 
 
 @app.post("/export/markdown")
-async def export_to_markdown(min_score: float = 6.0, output_dir: str = "data/markdown_export", output_file: Optional[str] = None):
+async def export_to_markdown(
+    background_tasks: BackgroundTasks,
+    min_score: float = 6.0,
+    output_dir: str = "data/markdown_export",
+    output_file: Optional[str] = None
+):
     """
     Export papers with relevance_score >= min_score to individual markdown files.
     Creates a folder named after the date range, with one markdown file per paper.
     Papers are sorted by score from high to low.
-    Automatically cleans up paper JSON files after successful export.
+    Paper JSON files are cleaned up in the background after a successful export
+    (the response doesn't wait for it).
     
     Args:
         min_score: Minimum relevance score to export (default: 6.0)
@@ -670,12 +866,11 @@ async def export_to_markdown(min_score: float = 6.0, output_dir: str = "data/mar
     """
     try:
         exporter = MarkdownExporter(output_dir=output_dir, config_path=config_path)
-        result = exporter.export(min_score=min_score, output_filename=output_file)
+        result = await exporter.export_async(min_score=min_score, output_filename=output_file)
         
-        # Clean up paper files after successful export
-        cleanup_count = cleanup_papers()
-        if cleanup_count > 0:
-            result["cleaned_up_files"] = cleanup_count
+        # Clean up paper files after successful export, once the response is sent
+        background_tasks.add_task(cleanup_papers_async)
+        result["cleanup_scheduled"] = True
         
         return {
             "message": "导出成功",
@@ -695,7 +890,7 @@ async def recheck_negative_keywords(config: Config, negative_keywords: set):
     """
     try:
         min_score = getattr(config, 'min_relevance_score_for_stage2', 6.0)
-        all_papers = fetcher.list_papers(limit=10000)
+        all_papers = paper_cache.all()
         
         # Filter papers: is_relevant=True and score >= threshold
         relevant_papers = [
@@ -709,31 +904,158 @@ async def recheck_negative_keywords(config: Config, negative_keywords: set):
         
         print(f"\n🔍 Rechecking {len(relevant_papers)} papers with new negative keywords: {negative_keywords}")
         
+        # All negative keywords matched in one pass per paper
+        match_negative = compile_keyword_matcher(negative_keywords)
+        
         updated_count = 0
         for paper in relevant_papers:
-            # Check if paper matches any negative keyword
-            searchable_text = f"{paper.title} {paper.preview_text}".lower()
+            # Check if paper matches any negative keyword (cached lowercase title + preview)
+            neg_kw = match_negative(paper.preview_lower)
+            if neg_kw is None:
+                continue
             
-            for neg_kw in negative_keywords:
-                if neg_kw.lower() in searchable_text:
-                    # Update paper to not relevant
-                    paper.is_relevant = False
-                    paper.relevance_score = 1.0
-                    paper.extracted_keywords = [f"❌ {neg_kw}"] + paper.extracted_keywords
-                    paper.one_line_summary = f"论文包含负面关键词「{neg_kw}」，自动标记为不相关"
-                    fetcher.save_paper(paper)
-                    updated_count += 1
-                    print(f"  ✗ Updated {paper.id}: matched negative keyword '{neg_kw}'")
-                    break  # Only need to match one negative keyword
+            # Cached entries have no html_content - update the full paper
+            paper = fetcher.load_paper(paper.id)
+            # Update paper to not relevant
+            paper.is_relevant = False
+            paper.relevance_score = 1.0
+            paper.extracted_keywords = [f"❌ {neg_kw}"] + paper.extracted_keywords
+            paper.one_line_summary = f"论文包含负面关键词「{neg_kw}」，自动标记为不相关"
+            fetcher.save_paper(paper)
+            updated_count += 1
+            print(f"  ✗ Updated {paper.id}: matched negative keyword '{neg_kw}'")
         
         print(f"✓ Recheck complete: {updated_count} papers updated to not relevant")
     
     except Exception as e:
         print(f"✗ Error rechecking negative keywords: {e}")
-        import traceback
         traceback.print_exc()
 
 
+# Repo root and the fallback upload script, resolved once
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_SCRIPT = os.path.join(SCRIPT_DIR, "upload_to_github.sh")
+HAS_UPLOAD_SCRIPT = os.path.exists(UPLOAD_SCRIPT)  # Checked once: the script ships with the repo
+UPLOAD_SCRIPT_TIMEOUT = 600  # Seconds
+
+
+# Export/upload runs one at a time; requests arriving meanwhile coalesce into one rerun
+_post_analysis_lock = asyncio.Lock()
+_post_analysis_dirty = False
+
+
+async def run_post_analysis(min_score: float):
+    """
+    Export -> upload -> cleanup, run after every analysis cycle.
+    If a run is already in progress, only marks it dirty: that run repeats
+    once when done, so a burst of analysis cycles costs at most two pushes.
+    Errors are logged, never raised.
+    """
+    global _post_analysis_dirty
+    if _post_analysis_lock.locked():
+        _post_analysis_dirty = True
+        print(f"ℹ️  Export/upload already running, will re-run once it finishes")
+        return
+    
+    async with _post_analysis_lock:
+        while True:
+            _post_analysis_dirty = False
+            await _export_upload_cleanup(min_score)
+            if not _post_analysis_dirty:
+                break
+
+
+async def _export_upload_cleanup(min_score: float):
+    """One export -> upload -> cleanup pass. Paper files are only cleaned up once the upload succeeded."""
+    try:
+        print(f"📝 Auto-exporting papers to markdown...")
+        # Export to markdown (file I/O runs in worker threads)
+        exporter = MarkdownExporter(output_dir="data/markdown_export", config_path=config_path)
+        result = await exporter.export_async(min_score)
+        print(f"✓ Auto-export completed: {result['exported_papers']} papers exported to {result.get('output_folder', 'N/A')}")
+    except Exception as export_error:
+        print(f"⚠️  Auto-export failed: {export_error}")
+        traceback.print_exc()
+        return
+    
+    # Auto-upload to GitHub after export (failures are logged, never raised)
+    if await upload_export_to_github(result.get('output_folder', '')):
+        print(f"✓ Auto-upload to GitHub completed!")
+        
+        # Clean up paper files after successful export and upload
+        cleanup_count = await cleanup_papers_async()
+        if cleanup_count > 0:
+            print(f"✓ Cleaned up {cleanup_count} paper files")
+
+
+async def upload_export_to_github(folder_path: str) -> bool:
+    """
+    Publish an export folder to the GitHub Pages repo. Returns True on success.
+    With GITHUB_TOKEN set: one in-process Git Data API commit (github_uploader).
+    Without: falls back to upload_to_github.sh, which uses the local git credentials.
+    """
+    try:
+        if os.getenv("GITHUB_TOKEN") and folder_path:
+            print(f"📤 Auto-uploading to GitHub (API)...")
+            await github_uploader.upload_folder(
+                folder_path,
+                repo=os.getenv("GITHUB_REPO", github_uploader.DEFAULT_REPO),
+                branch=os.getenv("GITHUB_BRANCH", github_uploader.DEFAULT_BRANCH),
+            )
+            return True
+        
+        if not HAS_UPLOAD_SCRIPT:
+            print(f"⚠️  Upload script not found: {UPLOAD_SCRIPT}")
+            return False
+        
+        print(f"📤 Auto-uploading to GitHub...")
+        proc = await asyncio.create_subprocess_exec(
+            "bash", UPLOAD_SCRIPT, *([folder_path] if folder_path else []),
+            cwd=SCRIPT_DIR,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=UPLOAD_SCRIPT_TIMEOUT)
+        except asyncio.TimeoutError:
+            # A hung git push must not hold the post-analysis lock forever
+            proc.kill()
+            await proc.wait()
+            print(f"⚠️  GitHub upload timed out after {UPLOAD_SCRIPT_TIMEOUT}s")
+            return False
+        if proc.returncode != 0:
+            print(f"⚠️  GitHub upload failed: {stderr.decode(errors='replace')}")
+            return False
+        return True
+    except Exception as e:  # Any failure (HTTP, disk, unexpected API JSON) only skips this upload
+        print(f"⚠️  GitHub upload failed: {e}")
+        return False
+
+
+# Negative-keyword recheck: at most one run at a time, plus the latest request waiting behind it
+_recheck_task: Optional[asyncio.Task] = None
+_recheck_pending: Optional[tuple] = None  # (config, negative_keywords) for the next run
+
+
+def schedule_negative_keyword_recheck(config: Config, negative_keywords: set):
+    """
+    Request a recheck. A burst of config edits costs at most two scans:
+    the running one, then one more with the newest keyword set.
+    """
+    global _recheck_task, _recheck_pending
+    _recheck_pending = (config, negative_keywords)  # Newer request replaces an older waiting one
+    if _recheck_task is None or _recheck_task.done():
+        _recheck_task = asyncio.create_task(_run_negative_keyword_rechecks())
+
+
+async def _run_negative_keyword_rechecks():
+    global _recheck_pending
+    while _recheck_pending is not None:
+        config, negative_keywords = _recheck_pending
+        _recheck_pending = None
+        await recheck_negative_keywords(config, negative_keywords)
+
+
 async def check_pending_deep_analysis():
     """
     Check for papers marked as relevant but lacking deep analysis (Stage 2).
@@ -741,8 +1063,8 @@ async def check_pending_deep_analysis():
     Process these papers with priority on startup.
     """
     try:
-        config = Config.load(config_path)
-        all_papers = fetcher.list_papers(limit=10000)
+        config = get_config_cached()
+        all_papers = await fetcher.list_papers_async(limit=10000)
         
         min_score = getattr(config, 'min_relevance_score_for_stage2', 6.0)
         
@@ -758,65 +1080,24 @@ async def check_pending_deep_analysis():
             print(f"\n🔍 Found {len(pending_papers)} papers pending deep analysis (score >= {min_score})")
             print(f"📚 Prioritizing deep analysis for these papers...")
             
-            # Process with skip_stage1=True since they're already marked as relevant
-            await analyzer.process_papers(pending_papers, config, skip_stage1=True)
+            # Highest scores first, in batches of concurrent_papers, so the most
+            # valuable papers finish early and the API is never flooded
+            pending_papers.sort(key=lambda p: p.relevance_score, reverse=True)
+            batch_size = max(1, config.concurrent_papers)
+            papers_iter = iter(pending_papers)
+            while batch := list(itertools.islice(papers_iter, batch_size)):
+                # Process with skip_stage1=True since they're already marked as relevant
+                await analyzer.process_papers(batch, config, skip_stage1=True)
+                await asyncio.sleep(0)  # Let API requests run between batches
             print(f"✓ Completed pending deep analysis for {len(pending_papers)} papers")
             
-            # Auto-export after deep analysis (run in thread pool to avoid blocking)
-            try:
-                print(f"📝 Auto-exporting papers to markdown...")
-                import concurrent.futures
-                import subprocess
-                import os
-                loop = asyncio.get_event_loop()
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    # Export to markdown
-                    exporter = MarkdownExporter(output_dir="data/markdown_export", config_path=config_path)
-                    result = await loop.run_in_executor(executor, exporter.export, 6.0)
-                    print(f"✓ Auto-export completed: {result['exported_papers']} papers exported to {result.get('output_folder', 'N/A')}")
-                    
-                    # Auto-upload to GitHub after export (in same executor)
-                    try:
-                        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                        upload_script = os.path.join(script_dir, "upload_to_github.sh")
-                        if os.path.exists(upload_script):
-                            print(f"📤 Auto-uploading to GitHub...")
-                            def run_upload():
-                                # Pass the output folder path to the upload script
-                                folder_path = result.get('output_folder', '')
-                                return subprocess.run(
-                                    ["bash", upload_script, folder_path] if folder_path else ["bash", upload_script],
-                                    cwd=script_dir,
-                                    capture_output=True,
-                                    text=True
-                                )
-                            result_upload = await loop.run_in_executor(executor, run_upload)
-                            if result_upload.returncode == 0:
-                                print(f"✓ Auto-upload to GitHub completed!")
-                                
-                                # Clean up paper files after successful export and upload
-                                def run_cleanup():
-                                    return cleanup_papers()
-                                cleanup_count = await loop.run_in_executor(executor, run_cleanup)
-                                if cleanup_count > 0:
-                                    print(f"✓ Cleaned up {cleanup_count} paper files")
-                            else:
-                                print(f"⚠️  GitHub upload failed: {result_upload.stderr}")
-                        else:
-                            print(f"⚠️  Upload script not found: {upload_script}")
-                    except Exception as upload_error:
-                        print(f"⚠️  GitHub upload failed: {upload_error}")
-                        # Don't fail if upload fails
-            except Exception as export_error:
-                print(f"⚠️  Auto-export failed: {export_error}")
-                import traceback
-                traceback.print_exc()
+            # Auto-export after deep analysis
+            await run_post_analysis(6.0)
         else:
             print(f"✓ No pending deep analysis required (min score: {min_score})")
             
     except Exception as e:
         print(f"✗ Error checking pending deep analysis: {e}")
-        import traceback
         traceback.print_exc()
 
 
@@ -830,62 +1111,29 @@ async def analyze_papers_task(papers: List[Paper], config: Config):
         await analyzer.process_papers(papers, config)
         print(f"✓ Analysis complete")
         
-        # Automatically export to markdown after analysis (run in thread pool to avoid blocking)
-        try:
-            print(f"📝 Auto-exporting papers to markdown...")
-            import concurrent.futures
-            import subprocess
-            import os
-            loop = asyncio.get_event_loop()
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                # Export to markdown
-                exporter = MarkdownExporter(output_dir="data/markdown_export", config_path=config_path)
-                result = await loop.run_in_executor(executor, exporter.export, 6.0)
-                print(f"✓ Auto-export completed: {result['exported_papers']} papers exported to {result.get('output_folder', 'N/A')}")
-                
-                # Auto-upload to GitHub after export (in same executor)
-                try:
-                    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    upload_script = os.path.join(script_dir, "upload_to_github.sh")
-                    if os.path.exists(upload_script):
-                        print(f"📤 Auto-uploading to GitHub...")
-                        def run_upload():
-                            # Pass the output folder path to the upload script
-                            folder_path = result.get('output_folder', '')
-                            return subprocess.run(
-                                ["bash", upload_script, folder_path] if folder_path else ["bash", upload_script],
-                                cwd=script_dir,
-                                capture_output=True,
-                                text=True
-                            )
-                        result_upload = await loop.run_in_executor(executor, run_upload)
-                        if result_upload.returncode == 0:
-                            print(f"✓ Auto-upload to GitHub completed!")
-                            
-                            # Clean up paper files after successful export and upload
-                            def run_cleanup():
-                                return cleanup_papers()
-                            cleanup_count = await loop.run_in_executor(executor, run_cleanup)
-                            if cleanup_count > 0:
-                                print(f"✓ Cleaned up {cleanup_count} paper files")
-                        else:
-                            print(f"⚠️  GitHub upload failed: {result_upload.stderr}")
-                    else:
-                        print(f"⚠️  Upload script not found: {upload_script}")
-                except Exception as upload_error:
-                    print(f"⚠️  GitHub upload failed: {upload_error}")
-                    # Don't fail if upload fails
-        except Exception as export_error:
-            print(f"⚠️  Auto-export failed: {export_error}")
-            import traceback
-            traceback.print_exc()
-            # Don't fail the whole analysis if export fails
+        # Automatically export to markdown after analysis (never fails the analysis)
+        await run_post_analysis(6.0)
     except Exception as e:
         print(f"✗ Analysis error: {e}")
-        import traceback
         traceback.print_exc()
 
 
+async def request_server_exit():
+    """
+    Stop the server the way Ctrl+C would: stop accepting, drain in-flight
+    requests, then run lifespan shutdown (pools closed, saves flushed).
+    """
+    server = getattr(app.state, "server", None)
+    if server is not None:
+        # An exit requested before startup finished would skip lifespan shutdown
+        while not server.started:
+            await asyncio.sleep(0.1)
+        server.should_exit = True
+    else:
+        # Started by an external `uvicorn api:app`: no server handle, use its signal handler
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
 async def background_fetcher():
     """
     Background task: check pending analysis first, then fetch + analyze loop.
@@ -903,7 +1151,7 @@ async def background_fetcher():
     run_count = 0
     while True:
         try:
-            config = Config.load(config_path)
+            config = get_config_cached()
             
             # Fetch new papers
             print(f"\n📡 Fetching papers... [{datetime.now().strftime('%H:%M:%S')}]")
@@ -926,42 +1174,43 @@ async def background_fetcher():
             if single_run_mode:
                 print(f"\n✅ Single run completed!")
                 print(f"   All tasks finished. Exiting...")
-                # Give a moment for any final cleanup
-                await asyncio.sleep(2)
-                # Stop the server
-                import os
-                import signal
-                os.kill(os.getpid(), signal.SIGTERM)
+                await request_server_exit()
                 return
             
-            # Sleep before next fetch (analysis runs in parallel)
-            await asyncio.sleep(config.fetch_interval)
+            # Sleep before next fetch (analysis runs in parallel), or until woken
+            try:
+                await asyncio.wait_for(new_papers_event.wait(), timeout=config.fetch_interval)
+                print(f"🔔 Woken up early: new papers signalled")
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                new_papers_event.clear()
             run_count += 1
         
         except Exception as e:
             print(f"✗ Background fetcher error: {e}")
-            import traceback
             traceback.print_exc()
             if single_run_mode:
                 # In single run mode, exit on error
                 print(f"\n⚠️  Single run failed. Exiting...")
-                import os
-                import signal
-                os.kill(os.getpid(), signal.SIGTERM)
+                await request_server_exit()
                 return
             await asyncio.sleep(60)  # Wait 1 min on error
 
 
 if __name__ == "__main__":
-    import uvicorn
-    import os
-    import sys
-    
     # Check for single run mode
     if "--once" in sys.argv or "--single-run" in sys.argv or os.getenv("SINGLE_RUN", "").lower() in ("1", "true", "yes"):
         single_run_mode = True
         print("🔄 Running in single-run mode (will exit after completion)")
     
     port = int(os.getenv("PORT", "5000"))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # libuv event loop + llhttp parser when installed (uvicorn[standard]); stdlib otherwise.
+    # Single process on purpose: the paper cache and background jobs live in memory.
+    loop_impl = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http_impl = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    print(f"⚡ Server: loop={loop_impl}, http={http_impl}")
+    server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port, loop=loop_impl, http=http_impl))
+    app.state.server = server  # Lets single-run mode stop the server cleanly
+    server.run()
 
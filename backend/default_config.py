@@ -1,5 +1,7 @@
 # Backend package
 
+from types import MappingProxyType
+
 # Default configuration
 DEFAULT_CONFIG = {
     "filter_keywords": [
@@ -37,5 +39,17 @@ DEFAULT_CONFIG = {
     "temperature": 0.3,
     "max_tokens": 2000,
     "concurrent_papers": 10,
+    "max_concurrent_requests": 16,
+    "max_context_chars": 60000,
+    "enable_stage1_fastpath": False,
+    "strict_stage1": False,
+    "stage1_max_preview_chars": 2500,
     "min_relevance_score_for_stage2": 6  # Minimum score to proceed to Stage 2 deep analysis
 }
+
+# Drop duplicate keywords (keeps order): each one costs a scan per paper
+for _key in ("filter_keywords", "negative_keywords"):
+    DEFAULT_CONFIG[_key] = list(dict.fromkeys(DEFAULT_CONFIG[_key]))
+
+# Read-only view, shared by everyone: copy with dict(DEFAULT_CONFIG) to modify
+DEFAULT_CONFIG = MappingProxyType(DEFAULT_CONFIG)
@@ -5,6 +5,12 @@ This module exports papers with relevance_score >= min_score to markdown files
 in a separate directory, without modifying the original codebase.
 """
 
+import asyncio
+import hashlib
+import json
+import logging
+import operator
+import re
 from pathlib import Path
 from typing import List, Optional
 from datetime import datetime
@@ -13,6 +19,59 @@ from models import Paper, Config
 from fetcher import ArxivFetcher
 
 
+# Per-file detail at DEBUG; the export itself only prints a summary
+logger = logging.getLogger("exporter")
+
+# Characters not allowed in export filenames (keeps letters, digits, ' ', '-', '_')
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w \-]')
+
+
+# Canonical YYYY-MM-DD: such strings compare in date order
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def _date_in_range(published_date: str, start_s: str, end_s: str) -> bool:
+    """
+    published_date ("2025-10-29T17:22:59Z" or "2025-10-29") within [start_s, end_s].
+    Bounds are canonical ISO dates. Unparseable dates count as in range
+    (better to include than exclude).
+    """
+    paper_date_s = published_date.split('T')[0]  # Extract date part
+    if not _ISO_DATE.fullmatch(paper_date_s):
+        # Rare non-canonical form (e.g. "2025-1-5"): normalize the slow way
+        try:
+            paper_date_s = datetime.strptime(paper_date_s, "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            return True
+    return start_s <= paper_date_s <= end_s
+
+
+# Directories this process already created: repeat exports skip the mkdir syscalls
+_MKDIR_CACHE: set = set()
+
+
+def _ensure_dir(path: Path):
+    key = str(path)
+    if key not in _MKDIR_CACHE:
+        path.mkdir(parents=True, exist_ok=True)
+        _MKDIR_CACHE.add(key)
+
+
+def _write_file(path: Path, content: str):
+    try:
+        path.write_text(content, encoding='utf-8')
+    except FileNotFoundError:
+        # Folder was removed behind the cache's back: recreate it once
+        _MKDIR_CACHE.discard(str(path.parent))
+        _ensure_dir(path.parent)
+        path.write_text(content, encoding='utf-8')
+
+
+def _content_digest(filename: str, content: str) -> str:
+    """Manifest fingerprint: a paper is unchanged only if name and content both match"""
+    return hashlib.blake2b(f"{filename}\0{content}".encode('utf-8'), digest_size=16).hexdigest()
+
+
 class MarkdownExporter:
     """
     Export papers to markdown format.
@@ -30,7 +89,7 @@ class MarkdownExporter:
         """
         self.fetcher = ArxivFetcher(data_dir=data_dir)
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(self.output_dir)
         self.config_path = Path(config_path)
     
     def export(self, min_score: float = 6.0, output_filename: str = None) -> dict:
@@ -46,11 +105,54 @@ class MarkdownExporter:
         Returns:
             dict with export statistics
         """
-        export_time = datetime.now()
+        plan = self._prepare_export(min_score)
+        
+        written = []
+        failed_count = plan["failed_papers"]
+        for paper_id, output_path, content in plan["files"]:
+            try:
+                _write_file(output_path, content)
+                written.append((paper_id, output_path))
+                logger.debug(f"  ✓ Exported {paper_id} -> {output_path.name}")
+            except Exception as e:
+                print(f"  ✗ Failed to write paper {paper_id}: {e}")
+                failed_count += 1
+        
+        self._save_manifest(plan, written)
+        return self._finish_export(plan, written, failed_count)
+    
+    async def export_async(self, min_score: float = 6.0, output_filename: str = None) -> dict:
+        """
+        Same as export(), for async callers: never blocks the event loop.
+        The markdown files are written concurrently in worker threads.
+        """
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(None, self._prepare_export, min_score)
         
-        # Load all papers
-        all_papers = self.fetcher.list_papers(skip=0, limit=0)  # Load all papers
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, _write_file, output_path, content) for _, output_path, content in plan["files"]),
+            return_exceptions=True
+        )
         
+        written = []
+        failed_count = plan["failed_papers"]
+        for (paper_id, output_path, _), error in zip(plan["files"], results):
+            if isinstance(error, Exception):
+                print(f"  ✗ Failed to write paper {paper_id}: {error}")
+                failed_count += 1
+            else:
+                written.append((paper_id, output_path))
+                logger.debug(f"  ✓ Exported {paper_id} -> {output_path.name}")
+        
+        await loop.run_in_executor(None, self._save_manifest, plan, written)
+        return self._finish_export(plan, written, failed_count)
+    
+    def _prepare_export(self, min_score: float) -> dict:
+        """
+        Load, filter and render everything; no markdown files are written yet.
+        Returns a plan dict; plan["files"] is a list of (paper_id, output_path, content)
+        holding only files that changed since the last export (see the manifest).
+        """
         # Load config to get date range
         start_date = None
         end_date = None
@@ -66,42 +168,43 @@ class MarkdownExporter:
         if not start_date or not end_date:
             raise ValueError("Date range not found in config. Please ensure config.json has start_date and end_date.")
         
-        # Filter papers with score >= min_score and within date range
-        filtered_papers = []
-        for p in all_papers:
-            # Check score
-            if p.relevance_score < min_score:
-                continue
-            
-            # Check date range
-            if p.published_date:
-                try:
-                    # Parse published_date (format: "2025-10-29T17:22:59Z" or "2025-10-29")
-                    paper_date_str = p.published_date.split('T')[0]  # Extract date part
-                    paper_date = datetime.strptime(paper_date_str, "%Y-%m-%d").date()
-                    start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                    end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                    
-                    if not (start <= paper_date <= end):
-                        continue  # Skip papers outside date range
-                except Exception as e:
-                    # If date parsing fails, include the paper (better to include than exclude)
-                    pass
-            
-            filtered_papers.append(p)
+        # Parse the range bounds once; canonical ISO strings then compare like dates
+        try:
+            start_s = datetime.strptime(start_date, "%Y-%m-%d").date().isoformat()
+            end_s = datetime.strptime(end_date, "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            start_s = end_s = None  # Unparseable range: no date filtering (better to include than exclude)
+        
+        # Only candidate papers are parsed; the exact filter below still decides
+        total_papers = self.fetcher.count_papers()
+        candidates = self.fetcher.iter_papers(
+            min_score=min_score,
+            date_range=(start_s, end_s) if start_s else None
+        )
         
-        # Sort by relevance score (descending)
-        filtered_papers.sort(key=lambda p: p.relevance_score, reverse=True)
+        # Papers with score >= min_score and within date range, best score first
+        filtered_papers = [
+            p for p in candidates
+            if p.relevance_score >= min_score
+            and not (start_s and p.published_date and not _date_in_range(p.published_date, start_s, end_s))
+        ]
+        filtered_papers.sort(key=operator.attrgetter('relevance_score'), reverse=True)
         
         # Create folder name from date range
         folder_name = f"{start_date}_to_{end_date}"
         output_folder = self.output_dir / folder_name
-        output_folder.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(output_folder)
         
         print(f"📝 Exporting {len(filtered_papers)} papers with score >= {min_score} to folder: {folder_name}/")
         
-        # Export each paper to a separate markdown file
-        exported_count = 0
+        # paper id -> digest of the file written for it last time
+        manifest_path = self.output_dir / f".{folder_name}.manifest.json"
+        old_manifest = self._load_manifest(manifest_path)
+        manifest = {}  # Entries for unchanged files; written ones are added after the write
+        digests = {}
+        
+        # Render each paper to its own markdown file
+        files = []
         failed_count = 0
         
         for idx, paper in enumerate(filtered_papers, 1):
@@ -114,8 +217,7 @@ class MarkdownExporter:
                 index_str = f"{idx:03d}"  # Zero-padded index (001, 002, ...)
                 
                 # Sanitize paper title for filename (remove special characters)
-                safe_title = "".join(c for c in paper.title[:50] if c.isalnum() or c in (' ', '-', '_')).strip()
-                safe_title = safe_title.replace(' ', '_')
+                safe_title = _UNSAFE_FILENAME_CHARS.sub('', paper.title[:50]).strip().replace(' ', '_')
                 if not safe_title:
                     safe_title = paper.id
                 
@@ -124,114 +226,128 @@ class MarkdownExporter:
                 filename = f"{index_str}_{score_padded}_{paper.id}_{safe_title}.md"
                 output_path = output_folder / filename
                 
-                # Generate markdown content for single paper
-                lines = []
-                
-                # Header with title
-                lines.append(f"# {paper.title}\n")
-                lines.append(f"**相关性评分**: {paper.relevance_score}/10\n")
-                lines.append(f"**排名**: #{idx}\n")
-                lines.append("")
-                lines.append("---\n")
-                lines.append("")
-                
-                # Add paper content
-                paper_content = self._paper_to_markdown_content(paper)
-                lines.append(paper_content)
-                
-                # Write to file
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write("\n".join(lines))
-                
-                exported_count += 1
-                print(f"  ✓ Exported {paper.id} (score: {paper.relevance_score}/10) -> {filename}")
+                # Markdown document for single paper: header with title, then paper content
+                content = (
+                    f"# {paper.title}\n\n"
+                    f"**相关性评分**: {paper.relevance_score}/10\n\n"
+                    f"**排名**: #{idx}\n\n\n"
+                    f"---\n\n\n"
+                    f"{self._paper_to_markdown_content(paper)}"
+                )
+                digest = _content_digest(filename, content)
+                if old_manifest.get(paper.id) == digest and output_path.exists():
+                    manifest[paper.id] = digest  # Identical file already on disk
+                    continue
+                digests[paper.id] = digest
+                files.append((paper.id, output_path, content))
             except Exception as e:
                 print(f"  ✗ Failed to process paper {paper.id}: {e}")
                 failed_count += 1
                 continue
         
+        return {
+            "total_papers": total_papers,
+            "min_score": min_score,
+            "output_folder": output_folder,
+            "date_range": folder_name,
+            "files": files,
+            "failed_papers": failed_count,
+            "manifest_path": manifest_path,
+            "manifest": manifest,
+            "digests": digests,
+        }
+    
+    @staticmethod
+    def _load_manifest(manifest_path: Path) -> dict:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # Missing / corrupt: everything counts as changed
+    
+    @staticmethod
+    def _save_manifest(plan: dict, written: list):
+        """Record unchanged + successfully written files (failed ones get retried next time)"""
+        manifest = dict(plan["manifest"])
+        for paper_id, _ in written:
+            manifest[paper_id] = plan["digests"][paper_id]
+        try:
+            tmp_path = plan["manifest_path"].with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, sort_keys=True)
+            tmp_path.replace(plan["manifest_path"])
+        except OSError as e:
+            print(f"   ⚠️  Could not save export manifest: {e}")
+    
+    @staticmethod
+    def _finish_export(plan: dict, written: list, failed_count: int) -> dict:
+        """Print the summary and build the statistics dict"""
+        unchanged_count = len(plan["manifest"])
         print(f"\n✅ Export completed!")
-        print(f"   Total papers: {len(all_papers)}")
-        print(f"   Exported: {exported_count}")
+        print(f"   Total papers: {plan['total_papers']}")
+        print(f"   Exported: {len(written) + unchanged_count} ({len(written)} written, {unchanged_count} unchanged)")
         print(f"   Failed: {failed_count}")
-        print(f"   Output folder: {output_folder}")
+        print(f"   Output folder: {plan['output_folder']}")
         
         return {
-            "total_papers": len(all_papers),
-            "exported_papers": exported_count,
+            "total_papers": plan["total_papers"],
+            "exported_papers": len(written) + unchanged_count,
             "failed_papers": failed_count,
-            "min_score": min_score,
-            "output_folder": str(output_folder),
-            "date_range": f"{start_date}_to_{end_date}"
+            "min_score": plan["min_score"],
+            "output_folder": str(plan["output_folder"]),
+            "date_range": plan["date_range"],
+            "unchanged_papers": unchanged_count,
         }
     
     def _paper_to_markdown_content(self, paper: Paper) -> str:
         """Convert a Paper object to markdown content"""
-        lines = []
-        
-        # Metadata
-        lines.append("## 基本信息\n")
-        lines.append(f"- **arXiv ID**: [{paper.id}]({paper.url})")
-        lines.append(f"- **发布时间**: {paper.published_date or 'N/A'}")
-        lines.append(f"- **相关性评分**: {paper.relevance_score}/10")
-        lines.append(f"- **是否相关**: {'是' if paper.is_relevant else '否'}")
-        lines.append("")
+        # One string per section, optional sections only when present
+        sections = [
+            # Metadata
+            f"## 基本信息\n\n"
+            f"- **arXiv ID**: [{paper.id}]({paper.url})\n"
+            f"- **发布时间**: {paper.published_date or 'N/A'}\n"
+            f"- **相关性评分**: {paper.relevance_score}/10\n"
+            f"- **是否相关**: {'是' if paper.is_relevant else '否'}\n"
+        ]
         
         # Authors
         if paper.authors:
-            lines.append("## 作者\n")
-            lines.append(", ".join(paper.authors))
-            lines.append("")
+            sections.append(f"## 作者\n\n{', '.join(paper.authors)}\n")
         
         # Keywords
         if paper.extracted_keywords:
-            lines.append("## 关键词\n")
-            keywords_str = ", ".join([kw.replace("❌ ", "").replace("✅ ", "") for kw in paper.extracted_keywords])
-            lines.append(keywords_str)
-            lines.append("")
+            keywords_str = ", ".join(kw.replace("❌ ", "").replace("✅ ", "") for kw in paper.extracted_keywords)
+            sections.append(f"## 关键词\n\n{keywords_str}\n")
         
         # One-line summary
         if paper.one_line_summary:
-            lines.append("## 一句话总结\n")
-            lines.append(paper.one_line_summary)
-            lines.append("")
+            sections.append(f"## 一句话总结\n\n{paper.one_line_summary}\n")
         
         # Abstract
-        lines.append("## 摘要\n")
-        lines.append(paper.abstract)
-        lines.append("")
+        sections.append(f"## 摘要\n\n{paper.abstract}\n")
         
         # Detailed summary (Stage 2 analysis)
         if paper.detailed_summary:
-            lines.append("## 详细分析\n")
-            lines.append(paper.detailed_summary)
-            lines.append("")
+            sections.append(f"## 详细分析\n\n{paper.detailed_summary}\n")
         
         # Q&A pairs
         if paper.qa_pairs:
-            lines.append("## 问答对\n")
-            for idx, qa in enumerate(paper.qa_pairs, 1):
-                lines.append(f"### 问题 {idx}\n")
-                lines.append(f"**Q**: {qa.question}\n")
-                
-                if qa.thinking:
-                    lines.append(f"**思考过程**:\n\n{qa.thinking}\n")
-                
-                lines.append(f"**A**: {qa.answer}\n")
-                
-                if qa.is_reasoning:
-                    lines.append("*（使用推理模式生成）*\n")
-                
-                lines.append("")
+            sections.append("## 问答对\n")
+            sections.extend(
+                f"### 问题 {idx}\n\n"
+                f"**Q**: {qa.question}\n\n"
+                + (f"**思考过程**:\n\n{qa.thinking}\n\n" if qa.thinking else "")
+                + f"**A**: {qa.answer}\n\n"
+                + ("*（使用推理模式生成）*\n\n" if qa.is_reasoning else "")
+                for idx, qa in enumerate(paper.qa_pairs, 1)
+            )
         
         # Links
-        lines.append("## 相关链接\n")
-        lines.append(f"- [arXiv 页面]({paper.url})")
-        if paper.html_url:
-            lines.append(f"- [HTML 版本]({paper.html_url})")
-        lines.append("")
+        html_link = f"- [HTML 版本]({paper.html_url})\n" if paper.html_url else ""
+        sections.append(f"## 相关链接\n\n- [arXiv 页面]({paper.url})\n{html_link}")
         
-        return "\n".join(lines)
+        return "\n".join(sections)
     
 
 
@@ -280,7 +396,7 @@ def main():
     print(f"   Total papers: {result['total_papers']}")
     print(f"   Exported: {result['exported_papers']}")
     print(f"   Failed: {result['failed_papers']}")
-    print(f"   Output file: {result['output_file']}")
+    print(f"   Output folder: {result['output_folder']}")
 
 
 if __name__ == "__main__":
@@ -7,16 +7,182 @@ Downloads HTML version for DeepSeek analysis.
 
 import asyncio
 import httpx
-import feedparser
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from lxml import etree
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+import io
 import json
+import re
 from datetime import datetime
 import os
-from typing import Optional
+import time
 
-from models import Paper,Config
+import msgspec
+
+try:
+    from selectolax.lexbor import LexborHTMLParser  # C (lexbor) parser, ~15x faster than BeautifulSoup
+except ImportError:
+    LexborHTMLParser = None
+
+from models import Paper, Config, html_body_path, write_html_body, write_paper_json
+
+
+# Top-level fields read straight from the raw JSON bytes. Inside string values
+# every quote is escaped, so a match not preceded by a backslash is the real key.
+_RAW_SCORE_RE = re.compile(rb'(?<!\\)"relevance_score":\s*(-?[0-9][0-9.eE+-]*)')
+_RAW_DATE_RE = re.compile(rb'(?<!\\)"published_date":\s*"([^"\\]*)"')
+# Non-empty inline html_content (files saved before the text moved to .html.gz)
+_RAW_INLINE_HTML_RE = re.compile(rb'(?<!\\)"html_content":\s*"(?!")')
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ARXIV_PAGE_SIZE = 1000  # Results per API request (arXiv allows up to 2000)
+ARXIV_API_INTERVAL = 3.0  # arXiv asks for 3s between consecutive API calls
+ARXIV_HTML_INTERVAL = 1.0  # At most one arxiv.org/html request per second
+HTML_FETCH_CONCURRENCY = 4  # Parallel arxiv.org/html downloads per fetch
+# Body cap for one HTML page. Normal papers are far below it (the full text is kept
+# for Stage 2 / Q&A); it only stops a pathological page from being buffered whole.
+MAX_HTML_BYTES = 16 * 1024 * 1024
+PAPER_LOAD_BATCH = 64  # Paper files read per I/O pool job when listing
+
+# Decodes paper JSON straight into the Paper dataclass (nested QAPairs included), no dict in between
+_PAPER_DECODER = msgspec.json.Decoder(Paper)
+
+
+def _read_bytes(path) -> bytes:
+    """
+    Whole file via raw os.open/os.read: skips the file object and buffering
+    layer Path.read_bytes() sets up for each of the small paper JSONs.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 256 * 1024)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+
+
+def _decode_paper(raw: bytes) -> Paper:
+    try:
+        return _PAPER_DECODER.decode(raw)
+    except msgspec.ValidationError:
+        # Loosely typed file (e.g. null where a string belongs): the old lenient path
+        return Paper.from_dict(json.loads(raw))
+
+
+_ATOM_NS = "http://www.w3.org/2005/Atom"
+# Namespaced tags built once, not per entry
+_ENTRY_TAG = f"{{{_ATOM_NS}}}entry"
+_LINK_TAG = f"{{{_ATOM_NS}}}link"
+_ID_TAG = f"{{{_ATOM_NS}}}id"
+_TITLE_TAG = f"{{{_ATOM_NS}}}title"
+_SUMMARY_TAG = f"{{{_ATOM_NS}}}summary"
+_PUBLISHED_TAG = f"{{{_ATOM_NS}}}published"
+# Compiled once; plain str results (smart strings would keep the tree alive)
+_AUTHOR_NAMES_XP = etree.XPath(
+    "atom:author/atom:name/text()", namespaces={"atom": _ATOM_NS}, smart_strings=False
+)
+
+
+class _RateLimiter:
+    """
+    Spaces calls at least `interval` seconds apart (start to start).
+    A request that itself took `interval` lets the next one go at once;
+    concurrent callers each reserve the next free slot.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        wait = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class FeedEntry(NamedTuple):
+    """The few Atom entry fields a Paper is built from"""
+    id: str
+    title: str
+    summary: str
+    link: str
+    published: str
+    authors: tuple
+
+
+def _child_text(entry, tag: str) -> str:
+    node = entry.find(tag)
+    return "".join(node.itertext()).strip() if node is not None else ""
+
+
+def parse_atom_entries(data: bytes) -> List[FeedEntry]:
+    """
+    Stream-parse an arXiv API Atom feed (lxml.iterparse, one <entry> in memory at a time)
+    into FeedEntry tuples. Malformed feeds yield whatever parsed before the error.
+    """
+    entries = []
+    try:
+        for _, entry in etree.iterparse(io.BytesIO(data), tag=_ENTRY_TAG, recover=True):
+            link = ""
+            for node in entry.iterfind(_LINK_TAG):
+                if node.get("rel", "alternate") == "alternate":
+                    link = node.get("href", "")
+                    break
+            entry_id = _child_text(entry, _ID_TAG)
+            entries.append(FeedEntry(
+                id=entry_id,
+                title=_child_text(entry, _TITLE_TAG),
+                summary=_child_text(entry, _SUMMARY_TAG),
+                link=link or entry_id,
+                published=_child_text(entry, _PUBLISHED_TAG),
+                authors=tuple(name for name in (n.strip() for n in _AUTHOR_NAMES_XP(entry)) if name),
+            ))
+            entry.clear()  # Done with this subtree
+    except etree.XMLSyntaxError as e:
+        print(f"  ⚠️  Malformed Atom feed, using {len(entries)} entries parsed before the error: {e}")
+    return entries
+
+
+async def _read_capped(response: httpx.Response, max_bytes: int) -> str:
+    """Decoded response body, reading at most max_bytes (a cut page still parses: HTML is lenient)"""
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            print(f"     ⚠️  HTML larger than {max_bytes // (1024 * 1024)} MB, truncated: {response.url}")
+            break
+    return b"".join(chunks)[:max_bytes].decode(response.encoding or "utf-8", errors="replace")
+
+
+def _html_to_text(html: str) -> str:
+    """
+    Text of the main article (<article>, else div#main, else the whole page),
+    one stripped text node per line - same output as BeautifulSoup's
+    get_text(separator='\\n', strip=True), which is the fallback without selectolax.
+    """
+    if LexborHTMLParser is None:
+        soup = BeautifulSoup(html, 'lxml')
+        article = soup.find('article') or soup.find('div', {'id': 'main'})
+        return (article or soup).get_text(separator='\n', strip=True)
+    
+    tree = LexborHTMLParser(html)
+    node = tree.css_first('article') or tree.css_first('div#main') or tree.root
+    if node is None:
+        return ""
+    node.strip_tags(['script', 'style', 'template'])  # get_text() skips these too
+    texts = (n.text(deep=False, strip=True) for n in node.traverse(include_text=True) if n.tag == '-text')
+    return '\n'.join(t for t in texts if t)
 
 
 class ArxivFetcher:
@@ -25,10 +191,32 @@ class ArxivFetcher:
     Simple and effective.
     """
     
-    def __init__(self, data_dir: str = "data/papers"):
+    def __init__(self, data_dir: str = "data/papers", on_save=None):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # Optional callback(paper) after every save (keeps in-memory caches current)
+        self.on_save = on_save
+        
+        # HTTP client reused across fetches (created on first use, inside the running loop)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Every export.arxiv.org request goes through this (pages, retries, single-paper lookups)
+        self._api_limiter = _RateLimiter(ARXIV_API_INTERVAL)
+        # Every arxiv.org/html download (retries included); the semaphore only caps concurrency
+        self._html_limiter = _RateLimiter(ARXIV_HTML_INTERVAL)
+        
+        # Last API response per result page offset: ((search query, page size), conditional request headers, body, parsed entries).
+        # The same date range is polled every cycle, so unchanged pages cost a 304 or no re-parse.
+        self._feed_cache: Dict[int, Tuple[tuple, dict, bytes, list]] = {}
+        
+        # Thread pool for parallel JSON reads (created on first use)
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        
+        # Ids arxiv.org answered 404 for on /html (no HTML version): never asked again.
+        # Append-only, one id per line, loaded once.
+        self._no_html_path = self.data_dir.parent / "no_html.txt"
+        self._no_html: Set[str] = self._load_no_html()
+        
         # arXiv RSS feed URLs for different categories
         self.categories = [
             "cs.RO",  # Robotics
@@ -43,12 +231,34 @@ class ArxivFetcher:
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         }
 
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Shared keep-alive client for export.arxiv.org and arxiv.org, created on first use.
+        HTTP/2 lets concurrent HTML downloads share one connection.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=30.0,
+                follow_redirects=True,
+                http2=True,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=8, keepalive_expiry=60.0),
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client (call on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def fetch_latest(self, max_results: int = 100, config: Optional[Config] = None) -> List[Paper]:
         """
         Fetch arXiv papers by submission date.
 
         Args:
-            max_results: max papers per category
+            max_results: max papers per category (the combined query returns up to
+                max_results x number of categories)
             config: Config object (if None, uses Config class defaults)
         """
         # Use provided config or fall back to class defaults
@@ -59,137 +269,192 @@ class ArxivFetcher:
             start_date = Config.start_date
             end_date = Config.end_date
         
-        papers = []
-        # Track processed papers in this fetch session to avoid duplicates across categories
-        processed_ids = set()
-
         start_date = start_date.replace("-", "")
         end_date = (end_date or start_date).replace("-", "")
 
-        base_url = "https://export.arxiv.org/api/query"
+        client = self._get_client()
 
-        async with httpx.AsyncClient(
-                headers=self.headers,
-                timeout=30.0,
-                follow_redirects=True
-        ) as client:
-            for idx, category in enumerate(self.categories):
-                query = (
-                    f"cat:{category} AND "
-                    f"submittedDate:[{start_date} TO {end_date}]"
-                )
-
-                params = {
-                    "search_query": query,
-                    "start": 0,
-                    "max_results": max_results,
-                    "sortBy": "submittedDate",
-                    "sortOrder": "ascending",
-                }
-
-                print(f"  📂 Fetching {category} [{start_date} → {end_date}]")
-
-                # Retry logic for rate limiting (HTTP 429)
-                max_retries = 3
-                retry_delay = 3  # Start with 3 seconds
-                response = None
-                
-                for attempt in range(max_retries):
-                    try:
-                        response = await client.get(base_url, params=params)
-                        
-                        # Handle rate limiting (429)
-                        if response.status_code == 429:
-                            if attempt < max_retries - 1:
-                                wait_time = retry_delay * (2 ** attempt)  # Exponential backoff: 3s, 6s, 12s
-                                print(f"  ⚠️  Rate limited (429) for {category}, waiting {wait_time}s before retry {attempt + 1}/{max_retries}...")
-                                await asyncio.sleep(wait_time)
-                                continue
-                            else:
-                                print(f"  ✗ HTTP 429 for {category} after {max_retries} attempts. Skipping this category.")
-                                response = None  # Mark as failed
-                                break
-                        
-                        # Handle other non-200 status codes
-                        if response.status_code != 200:
-                            print(f"  ✗ HTTP {response.status_code} for {category}")
-                            break
-                        
-                        # Success - break out of retry loop
-                        break
-                        
-                    except httpx.RequestError as e:
-                        if attempt < max_retries - 1:
-                            wait_time = retry_delay * (2 ** attempt)
-                            print(f"  ⚠️  Network error for {category}, retrying in {wait_time}s ({attempt + 1}/{max_retries}): {e}")
-                            await asyncio.sleep(wait_time)
-                        else:
-                            print(f"  ✗ Network error for {category} after {max_retries} attempts: {e}")
-                            response = None  # Mark as failed
-                            break
-                    except Exception as e:
-                        print(f"  ✗ Unexpected error for {category}: {e}")
-                        response = None  # Mark as failed
-                        break
-                
-                # Check if we got a valid response
-                if response is None or response.status_code != 200:
+        # One OR-combined query for all categories, paged; arXiv returns each paper once
+        query = (
+            "(" + " OR ".join(f"cat:{category}" for category in self.categories) + ") AND "
+            f"submittedDate:[{start_date} TO {end_date}]"
+        )
+        total_limit = max_results * len(self.categories)
+        print(f"  📂 Fetching {', '.join(self.categories)} [{start_date} → {end_date}]")
+
+        feeds = []
+        start = 0
+        while start < total_limit:
+            page_size = min(ARXIV_PAGE_SIZE, total_limit - start)
+            entries = await self._fetch_page(client, query, start, page_size)
+            feeds.append(entries)
+            if len(entries) < page_size:
+                break  # Last page
+            start += page_size
+        print(f"     Found {sum(len(entries) for entries in feeds)} papers")
+
+        # Dedupe (against disk, and across pages in case the result set shifted) before any HTML download;
+        # ids already on disk come from one directory scan, not a stat() per entry
+        existing_ids = self._stored_ids()
+        processed_ids = set()
+        new_entries = []
+        for entries in feeds:
+            for entry in entries:
+                arxiv_id = entry.id.split("/abs/")[-1]
+                if arxiv_id in processed_ids or arxiv_id in existing_ids:
                     continue
+                processed_ids.add(arxiv_id)
+                new_entries.append((arxiv_id, entry))
 
-                feed = feedparser.parse(response.text)
-                print(f"     Found {len(feed.entries)} papers")
+        # HTML downloads overlap, but at most HTML_FETCH_CONCURRENCY hit arxiv.org at a time
+        sem = asyncio.Semaphore(HTML_FETCH_CONCURRENCY)
 
-                # Add delay between categories to avoid rate limiting
-                # arXiv recommends max 1 request per 3 seconds
-                if idx < len(self.categories) - 1:  # Don't delay after last category
-                    await asyncio.sleep(3)  # Wait 3 seconds between categories
+        async def build_paper(arxiv_id: str, entry) -> Paper:
+            async with sem:
+                html_content = await self._fetch_html(client, arxiv_id)
 
-                for entry in feed.entries:
-                    arxiv_id = entry.id.split("/abs/")[-1]
+            preview_text = self._extract_preview(html_content, entry.summary)
+            published_date = entry.published
 
-                    # Skip if already exists on disk OR already processed in this session
-                    if self._paper_exists(arxiv_id) or arxiv_id in processed_ids:
-                        if arxiv_id in processed_ids:
-                            # Silently skip - already processed in this fetch session
-                            continue
-                        # Already exists on disk
-                        continue
-                    
-                    # Mark as processed to avoid duplicates across categories
-                    processed_ids.add(arxiv_id)
-
-                    html_content = await self._fetch_html(client, arxiv_id)
-                    # Add small delay between HTML fetches to avoid rate limiting
-                    await asyncio.sleep(1)  # Wait 1 second between HTML downloads
-                    
-                    preview_text = self._extract_preview(html_content, entry.summary)
-                    published_date = getattr(entry, "published", "")
-
-                    paper = Paper(
-                        id=arxiv_id,
-                        title=entry.title,
-                        authors=self._extract_authors(entry),
-                        abstract=entry.summary,
-                        url=entry.link,
-                        html_url=f"https://arxiv.org/html/{arxiv_id}",
-                        html_content=html_content,
-                        preview_text=preview_text,
-                        published_date=published_date,
-                    )
-
-                    self._save_paper(paper)
-                    papers.append(paper)
-
-                    print(f"     ✓ {arxiv_id} - {paper.title[:60]}...")
+            paper = Paper(
+                id=arxiv_id,
+                title=entry.title,
+                authors=self._extract_authors(entry),
+                abstract=entry.summary,
+                url=entry.link,
+                html_url=f"https://arxiv.org/html/{arxiv_id}",
+                html_content=html_content,
+                preview_text=preview_text,
+                published_date=published_date,
+            )
+
+            # Saved as soon as its HTML is in: a crash or cancel keeps everything fetched so far
+            if await self.save_paper_async(paper):
+                paper.html_content = ""  # On disk now; paper.load_html() reads it back when needed
+            print(f"     ✓ {arxiv_id} - {paper.title[:60]}...")
+            return paper
+
+        results = await asyncio.gather(
+            *[build_paper(arxiv_id, entry) for arxiv_id, entry in new_entries],
+            return_exceptions=True
+        )
+        papers = []
+        for (arxiv_id, _), result in zip(new_entries, results):
+            if isinstance(result, Exception):
+                print(f"     ✗ {arxiv_id}: {result}")
+            else:
+                papers.append(result)
 
         return papers
 
+    async def _fetch_page(
+        self,
+        client: httpx.AsyncClient,
+        query: str,
+        start: int,
+        page_size: int
+    ) -> List[FeedEntry]:
+        """
+        One page of arXiv API results for search query (oldest submissions first).
+        Returns the feed entries, or [] if the request failed after retries.
+        """
+        params = {
+            "search_query": query,
+            "start": start,
+            "max_results": page_size,
+            "sortBy": "submittedDate",
+            "sortOrder": "ascending",
+        }
+        label = f"results {start}-{start + page_size}"
+        request_key = (query, page_size)
+
+        # Retry logic for rate limiting (HTTP 429)
+        max_retries = 3
+        retry_delay = 3  # Start with 3 seconds
+        response = None
+        
+        for attempt in range(max_retries):
+            try:
+                await self._api_limiter.acquire()
+                response = await client.get(ARXIV_API_URL, params=params, headers=self._conditional_headers(start, request_key))
+                
+                if response.status_code == 304:
+                    break
+                
+                # Handle rate limiting (429)
+                if response.status_code == 429:
+                    if attempt < max_retries - 1:
+                        wait_time = retry_delay * (2 ** attempt)  # Exponential backoff: 3s, 6s, 12s
+                        print(f"  ⚠️  Rate limited (429) for {label}, waiting {wait_time}s before retry {attempt + 1}/{max_retries}...")
+                        await asyncio.sleep(wait_time)
+                        continue
+                    else:
+                        print(f"  ✗ HTTP 429 for {label} after {max_retries} attempts. Skipping this page.")
+                        response = None  # Mark as failed
+                        break
+                
+                # Handle other non-200 status codes
+                if response.status_code != 200:
+                    print(f"  ✗ HTTP {response.status_code} for {label}")
+                    break
+                
+                # Success - break out of retry loop
+                break
+                
+            except httpx.RequestError as e:
+                if attempt < max_retries - 1:
+                    wait_time = retry_delay * (2 ** attempt)
+                    print(f"  ⚠️  Network error for {label}, retrying in {wait_time}s ({attempt + 1}/{max_retries}): {e}")
+                    await asyncio.sleep(wait_time)
+                else:
+                    print(f"  ✗ Network error for {label} after {max_retries} attempts: {e}")
+                    response = None  # Mark as failed
+                    break
+            except Exception as e:
+                print(f"  ✗ Unexpected error for {label}: {e}")
+                response = None  # Mark as failed
+                break
+        
+        # Check if we got a valid response
+        if response is None or response.status_code not in (200, 304):
+            return []
+
+        cached = self._feed_cache.get(start)
+        if cached and cached[0] != request_key:
+            cached = None  # Date range or page size changed since
+        if response.status_code == 304 and cached:
+            entries = cached[3]
+            print(f"     {label}: not modified")
+            return entries
+        
+        body = response.content
+        if cached and cached[2] == body:
+            entries = cached[3]  # Same feed as last time: skip the re-parse
+        else:
+            entries = parse_atom_entries(body)
+        
+        # Remember validators (if arXiv sent any) and the parsed entries for the next cycle
+        validators = {
+            request_header: response.headers[response_header]
+            for response_header, request_header in (("etag", "If-None-Match"), ("last-modified", "If-Modified-Since"))
+            if response_header in response.headers
+        }
+        self._feed_cache[start] = (request_key, validators, body, entries)
+        return entries
+    
+    def _conditional_headers(self, start: int, request_key: tuple) -> dict:
+        """If-None-Match / If-Modified-Since for a result page we already have, else {}"""
+        cached = self._feed_cache.get(start)
+        return cached[1] if cached and cached[0] == request_key else {}
+
     async def _fetch_html(self, client: httpx.AsyncClient, arxiv_id: str) -> str:
         """
         Download HTML version of paper.
         Falls back to abstract if HTML not available.
         Includes retry logic for rate limiting.
         """
+        if arxiv_id in self._no_html:
+            return ""
         html_url = f"https://arxiv.org/html/{arxiv_id}"
         
         max_retries = 3
@@ -197,7 +462,10 @@ class ArxivFetcher:
         
         for attempt in range(max_retries):
             try:
-                response = await client.get(html_url)
+                await self._html_limiter.acquire()
+                async with client.stream("GET", html_url) as response:
+                    # Only the 200 body is read, and never more than MAX_HTML_BYTES of it
+                    html = await _read_capped(response, MAX_HTML_BYTES) if response.status_code == 200 else None
                 
                 # Handle rate limiting (429)
                 if response.status_code == 429:
@@ -210,15 +478,11 @@ class ArxivFetcher:
                         return ""
                 
                 if response.status_code == 200:
-                    # Extract main content
-                    soup = BeautifulSoup(response.text, 'lxml')
-                    
-                    # Try to find main article content
-                    article = soup.find('article') or soup.find('div', {'id': 'main'})
-                    if article:
-                        return article.get_text(separator='\n', strip=True)
-                    
-                    return soup.get_text(separator='\n', strip=True)
+                    return _html_to_text(html)
+                elif response.status_code == 404:
+                    # Definitive: no HTML version - retrying (now or next run) can't help
+                    self._remember_no_html(arxiv_id)
+                    return ""
                 else:
                     # Non-200 status (but not 429, which is handled above)
                     if attempt < max_retries - 1:
@@ -246,6 +510,23 @@ class ArxivFetcher:
         # Fallback: return empty, will use abstract
         return ""
     
+    def _load_no_html(self) -> Set[str]:
+        try:
+            with open(self._no_html_path, encoding='utf-8') as f:
+                return {line.strip() for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+    
+    def _remember_no_html(self, arxiv_id: str):
+        if arxiv_id in self._no_html:
+            return
+        self._no_html.add(arxiv_id)
+        try:
+            with open(self._no_html_path, 'a', encoding='utf-8') as f:
+                f.write(arxiv_id + "\n")
+        except OSError as e:
+            print(f"  ⚠️  Could not persist no-HTML id {arxiv_id}: {e}")
+    
     def _extract_preview(self, html_content: str, abstract: str) -> str:
         """
         Extract preview text (first 2000 chars).
@@ -259,13 +540,9 @@ class ArxivFetcher:
         
         return preview[:2000]
     
-    def _extract_authors(self, entry) -> List[str]:
-        """Extract author names from RSS entry"""
-        if hasattr(entry, 'authors'):
-            return [author.name for author in entry.authors]
-        elif hasattr(entry, 'author'):
-            return [entry.author]
-        return []
+    def _extract_authors(self, entry: FeedEntry) -> List[str]:
+        """Extract author names from a feed entry"""
+        return list(entry.authors)
     
     async def fetch_single_paper(self, arxiv_id: str) -> Paper:
         """
@@ -278,54 +555,61 @@ class ArxivFetcher:
         if self._paper_exists(arxiv_id):
             return self.load_paper(arxiv_id)
         
-        async with httpx.AsyncClient(headers=self.headers, timeout=30.0, follow_redirects=True) as client:
-            # Use arXiv API to get paper metadata
-            api_url = f"https://export.arxiv.org/api/query?id_list={arxiv_id}"
+        client = self._get_client()
+        
+        # Use arXiv API to get paper metadata
+        api_url = f"https://export.arxiv.org/api/query?id_list={arxiv_id}"
+        
+        try:
+            await self._api_limiter.acquire()
+            response = await client.get(api_url)
+            if response.status_code != 200:
+                raise Exception(f"arXiv API returned {response.status_code}")
             
-            try:
-                response = await client.get(api_url)
-                if response.status_code != 200:
-                    raise Exception(f"arXiv API returned {response.status_code}")
-                
-                # Parse Atom feed
-                feed = feedparser.parse(response.text)
-                
-                if not feed.entries or len(feed.entries) == 0:
-                    raise Exception(f"Paper {arxiv_id} not found on arXiv")
-                
-                entry = feed.entries[0]
-                
-                # Download HTML version
-                html_content = await self._fetch_html(client, arxiv_id)
-                
-                # Extract preview text
-                preview_text = self._extract_preview(html_content, entry.summary)
-                
-                # Extract published date
-                published_date = getattr(entry, 'published', '')
-                
-                # Create Paper object
-                paper = Paper(
-                    id=arxiv_id,
-                    title=entry.title,
-                    authors=self._extract_authors(entry),
-                    abstract=entry.summary,
-                    url=entry.link,
-                    html_url=f"https://arxiv.org/html/{arxiv_id}",
-                    html_content=html_content,
-                    preview_text=preview_text,
-                    published_date=published_date,
-                )
-                
-                # Save immediately
-                self.save_paper(paper)
-                print(f"✓ Fetched single paper: {arxiv_id} - {paper.title[:60]}...")
-                
-                return paper
+            # Parse Atom feed
+            entries = parse_atom_entries(response.content)
             
-            except Exception as e:
-                print(f"✗ Error fetching paper {arxiv_id}: {e}")
-                raise
+            if not entries:
+                raise Exception(f"Paper {arxiv_id} not found on arXiv")
+            
+            entry = entries[0]
+            
+            # Download HTML version
+            html_content = await self._fetch_html(client, arxiv_id)
+            
+            # Extract preview text
+            preview_text = self._extract_preview(html_content, entry.summary)
+            
+            # Extract published date
+            published_date = entry.published
+            
+            # Create Paper object
+            paper = Paper(
+                id=arxiv_id,
+                title=entry.title,
+                authors=self._extract_authors(entry),
+                abstract=entry.summary,
+                url=entry.link,
+                html_url=f"https://arxiv.org/html/{arxiv_id}",
+                html_content=html_content,
+                preview_text=preview_text,
+                published_date=published_date,
+            )
+            
+            # Save immediately
+            self.save_paper(paper)
+            print(f"✓ Fetched single paper: {arxiv_id} - {paper.title[:60]}...")
+            
+            return paper
+        
+        except Exception as e:
+            print(f"✗ Error fetching paper {arxiv_id}: {e}")
+            raise
+
+    def _stored_ids(self) -> set:
+        """Ids of all papers on disk (one scandir)"""
+        with os.scandir(self.data_dir) as entries:
+            return {e.name[:-5] for e in entries if e.name.endswith(".json")}
     
     def _paper_exists(self, arxiv_id: str) -> bool:
         """Check if paper already exists"""
@@ -333,9 +617,29 @@ class ArxivFetcher:
     
     def save_paper(self, paper: Paper):
         """Save paper to JSON file"""
-        file_path = self.data_dir / f"{paper.id}.json"
-        with open(file_path, 'w') as f:
-            json.dump(paper.to_dict(), f, indent=2, ensure_ascii=False)
+        self._write_paper_files(paper)
+        if self.on_save:
+            self.on_save(paper)
+    
+    async def save_paper_async(self, paper: Paper) -> bool:
+        """
+        save_paper() with the file writes (gzip + JSON) on the I/O pool, off the event loop;
+        on_save still runs on the loop. Failures are logged; returns whether it was saved.
+        """
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._get_io_pool(), self._write_paper_files, paper)
+        except Exception as e:
+            print(f"  ⚠️  Failed to save paper {paper.id}: {e}")
+            return False
+        if self.on_save:
+            self.on_save(paper)
+        return True
+    
+    def _write_paper_files(self, paper: Paper):
+        # The HTML text never changes after the fetch: write it once, out of the JSON
+        if paper.html_content and not html_body_path(self.data_dir, paper.id).exists():
+            write_html_body(self.data_dir, paper.id, paper.html_content)
+        write_paper_json(self.data_dir, paper.id, paper.to_storage_dict())
     
     # Keep _save_paper for backward compatibility
     def _save_paper(self, paper: Paper):
@@ -343,39 +647,144 @@ class ArxivFetcher:
         self.save_paper(paper)
     
     def load_paper(self, arxiv_id: str) -> Paper:
-        """Load paper from JSON file"""
+        """Load the full paper: JSON metadata plus its HTML text"""
         file_path = self.data_dir / f"{arxiv_id}.json"
-        with open(file_path) as f:
-            return Paper.from_dict(json.load(f))
+        paper = _decode_paper(_read_bytes(file_path))
+        paper.load_html(self.data_dir)
+        return paper
+    
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        """Thread pool for parallel paper file reads (created on first use)"""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="paper-io")
+        return self._io_pool
     
     def list_papers(self, skip: int = 0, limit: int = 20) -> List[Paper]:
         """
         List papers with pagination.
         If limit is None or <= 0, load all papers.
+        Metadata only: html_content stays empty (paper.load_html() reads it).
         """
-        paper_files = sorted(
-            self.data_dir.glob("*.json"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True
-        )
-        
-        papers = []
-        
-        # If limit is None or <= 0, load all papers
-        if limit is None or limit <= 0:
-            file_range = paper_files[skip:]
-        else:
-            file_range = paper_files[skip:skip + limit]
-        
-        for file_path in file_range:
+        batches = self._get_io_pool().map(self._load_files, self._batched(self._paper_files_page(skip, limit)))
+        return [paper for batch in batches for paper in batch]
+    
+    async def list_papers_async(self, skip: int = 0, limit: int = 20) -> List[Paper]:
+        """
+        Same as list_papers, but reads the files in parallel on a thread pool,
+        so the event loop stays responsive while thousands of files load.
+        """
+        io_pool = self._get_io_pool()
+        loop = asyncio.get_running_loop()
+        file_range = await loop.run_in_executor(io_pool, self._paper_files_page, skip, limit)
+        batches = await asyncio.gather(*[
+            loop.run_in_executor(io_pool, self._load_files, batch)
+            for batch in self._batched(file_range)
+        ])
+        return [paper for batch in batches for paper in batch]
+    
+    def iter_papers(
+        self,
+        min_score: Optional[float] = None,
+        date_range: Optional[Tuple[str, str]] = None
+    ) -> Iterator[Paper]:
+        """
+        Stream papers that may have relevance_score >= min_score and a published
+        date within date_range ((start, end) as YYYY-MM-DD), newest modified first.
+        Score and date are read from the raw file first; only candidates are
+        parsed into Paper objects. The prefilter never drops a match, but may
+        let a few non-matches through - callers still apply their exact filter.
+        """
+        for file_path in self._paper_files_page(0, 0):
             try:
-                with open(file_path) as f:
-                    papers.append(Paper.from_dict(json.load(f)))
-            except Exception as e:
+                raw = _read_bytes(file_path)
+            except OSError as e:
                 print(f"Warning: Failed to load paper {file_path.name}: {e}")
                 continue
+            if not self._raw_may_match(raw, min_score, date_range):
+                continue
+            try:
+                yield _decode_paper(raw)
+            except Exception as e:
+                print(f"Warning: Failed to load paper {file_path.name}: {e}")
+    
+    def migrate_inline_html(self) -> int:
+        """
+        Move html_content still stored inside paper JSONs into <id>.html.gz, so
+        listings stop reading the full text. Run before anything else writes
+        papers (startup); returns the number of files rewritten.
+        """
+        migrated = 0
+        for file_path in self._paper_files_page(0, 0):
+            try:
+                raw = _read_bytes(file_path)
+                if not _RAW_INLINE_HTML_RE.search(raw):
+                    continue
+                stat = file_path.stat()
+                self._write_paper_files(_decode_paper(raw))
+                # Listings order by mtime: the move must not make the paper look new
+                os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                migrated += 1
+            except Exception as e:
+                print(f"Warning: Failed to migrate paper {file_path.name}: {e}")
+        if migrated:
+            print(f"📦 Moved inline HTML text of {migrated} papers to .html.gz")
+        return migrated
+    
+    def count_papers(self) -> int:
+        """Number of stored paper files"""
+        return sum(1 for _ in self.data_dir.glob("*.json"))
+    
+    @staticmethod
+    def _raw_may_match(raw: bytes, min_score: Optional[float], date_range: Optional[Tuple[str, str]]) -> bool:
+        if min_score is not None:
+            match = _RAW_SCORE_RE.search(raw)
+            try:
+                if match and float(match.group(1)) < min_score:
+                    return False
+            except ValueError:
+                pass  # Odd number format: let the full parse decide
+        if date_range is not None:
+            match = _RAW_DATE_RE.search(raw)
+            if match:
+                paper_date = match.group(1).decode('utf-8', 'replace').split('T')[0]
+                # Only canonical dates are decided here; anything else goes to the caller
+                if _ISO_DATE_RE.fullmatch(paper_date) and not (date_range[0] <= paper_date <= date_range[1]):
+                    return False
+        return True
+    
+    def _paper_files_page(self, skip: int, limit: int) -> List[Path]:
+        """Paper files, newest modified first, sliced to the requested page"""
+        # One readdir; DirEntry.stat() needs no extra path lookup per file
+        with os.scandir(self.data_dir) as entries:
+            stamped = [(e.stat().st_mtime, e.name) for e in entries if e.name.endswith(".json")]
+        stamped.sort(reverse=True)
+        paper_files = [self.data_dir / name for _, name in stamped]
         
+        # If limit is None or <= 0, load all papers
+        if limit is None or limit <= 0:
+            return paper_files[skip:]
+        return paper_files[skip:skip + limit]
+    
+    @staticmethod
+    def _batched(paper_files: List[Path]) -> List[List[Path]]:
+        # One pool job per file costs more in future/wakeup overhead than the read itself
+        return [paper_files[i:i + PAPER_LOAD_BATCH] for i in range(0, len(paper_files), PAPER_LOAD_BATCH)]
+    
+    def _load_files(self, paper_files: List[Path]) -> List[Paper]:
+        """Load a batch of paper files in one pool job, skipping unreadable ones"""
+        papers = []
+        for file_path in paper_files:
+            paper = self._load_file(file_path)
+            if paper is not None:
+                papers.append(paper)
         return papers
+    
+    def _load_file(self, file_path: Path) -> Optional[Paper]:
+        try:
+            return _decode_paper(_read_bytes(file_path))
+        except Exception as e:
+            print(f"Warning: Failed to load paper {file_path.name}: {e}")
+            return None
 
 async def run_fetcher_loop(start_date, end_date, interval: int = 300):
     fetcher = ArxivFetcher()
@@ -383,6 +792,7 @@ async def run_fetcher_loop(start_date, end_date, interval: int = 300):
     print("🚀 Fetching arXiv papers by date...")
 
     papers = await fetcher.fetch_latest()
+    await fetcher.aclose()
 
     print(f"✓ Fetched {len(papers)} papers")
 
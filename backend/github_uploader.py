@@ -0,0 +1,161 @@
+"""
+GitHub uploader - push an export folder through the Git Data API.
+
+No clone, no git subprocess: files whose content already matches the
+folder on the branch are skipped (git blob SHAs compared locally), the rest
+are created as blobs in parallel, then one tree, one commit and one ref
+update. ~6 round-trips plus the changed blobs, all over one keep-alive
+HTTP/2 connection.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import aiofiles
+import httpx
+
+
+API_BASE = "https://api.github.com"
+DEFAULT_REPO = "insight-rain/insight-rain.github.io"
+DEFAULT_BRANCH = "main"
+MAX_PARALLEL_BLOBS = 8
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Shared client, created on first use (inside the running loop)"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE,
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            headers={"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"},
+        )
+    return _client
+
+
+async def aclose():
+    """Close the shared client (call on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _walk_files(folder: Path) -> List[Tuple[str, str]]:
+    """(absolute path, path relative to folder) for every file under folder"""
+    files = []
+    stack = [folder]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    files.append((entry.path, Path(entry.path).relative_to(folder).as_posix()))
+    files.sort(key=lambda f: f[1])
+    return files
+
+
+def _git_blob_sha(content: bytes) -> str:
+    """The SHA git (and GitHub) gives a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+async def upload_folder(
+    folder_path: str,
+    repo: str = DEFAULT_REPO,
+    branch: str = DEFAULT_BRANCH,
+    token: Optional[str] = None
+) -> Optional[str]:
+    """
+    Commit folder_path as <repo>/<folder name>/ on top of branch.
+
+    Returns:
+        New commit SHA, or None if the tree didn't change (nothing to commit)
+    Raises:
+        httpx.HTTPError on any failed API call - the branch is untouched then
+    """
+    token = token or os.getenv("GITHUB_TOKEN")
+    if not token:
+        raise ValueError("GITHUB_TOKEN not set")
+
+    folder = Path(folder_path)
+    if not folder.is_dir():
+        raise FileNotFoundError(f"Export folder not found: {folder_path}")
+
+    client = _get_client()
+    auth = {"Authorization": f"Bearer {token}"}
+
+    async def call(method: str, url: str, **kwargs) -> dict:
+        response = await client.request(method, f"/repos/{repo}{url}", headers=auth, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    # Current branch head and its tree
+    ref = await call("GET", f"/git/ref/heads/{branch}")
+    head_sha = ref["object"]["sha"]
+    head_commit = await call("GET", f"/git/commits/{head_sha}")
+    base_tree = head_commit["tree"]["sha"]
+
+    files = await asyncio.get_running_loop().run_in_executor(None, _walk_files, folder)
+    if not files:
+        print(f"   ℹ️  No files in {folder.name}, nothing to upload")
+        return None
+
+    # Blob SHAs of the folder as it is on the branch (empty if it isn't there yet)
+    remote_shas = {}
+    root = await call("GET", f"/git/trees/{base_tree}")
+    folder_tree = next((e for e in root["tree"] if e["path"] == folder.name and e["type"] == "tree"), None)
+    if folder_tree is not None:
+        subtree = await call("GET", f"/git/trees/{folder_tree['sha']}", params={"recursive": "1"})
+        remote_shas = {e["path"]: e["sha"] for e in subtree["tree"] if e["type"] == "blob"}
+
+    sem = asyncio.Semaphore(MAX_PARALLEL_BLOBS)
+
+    async def create_blob(path: str, rel: str) -> Optional[str]:
+        """New blob SHA, or None if the branch already has this exact file"""
+        async with sem:
+            async with aiofiles.open(path, "rb") as f:
+                content = await f.read()
+            if remote_shas.get(rel) == _git_blob_sha(content):
+                return None
+            blob = await call("POST", "/git/blobs", json={
+                "content": base64.b64encode(content).decode("ascii"),
+                "encoding": "base64",
+            })
+        return blob["sha"]
+
+    blob_shas = await asyncio.gather(*(create_blob(path, rel) for path, rel in files))
+    changed = [(rel, sha) for (_, rel), sha in zip(files, blob_shas) if sha is not None]
+    if not changed:
+        print("   ℹ️  No changes to commit")
+        return None
+
+    tree = await call("POST", "/git/trees", json={
+        "base_tree": base_tree,
+        "tree": [
+            {"path": f"{folder.name}/{rel}", "mode": "100644", "type": "blob", "sha": sha}
+            for rel, sha in changed
+        ],
+    })
+    if tree["sha"] == base_tree:
+        print("   ℹ️  No changes to commit")
+        return None
+
+    commit = await call("POST", "/git/commits", json={
+        "message": f"Auto-update: Add paper export {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "tree": tree["sha"],
+        "parents": [head_sha],
+    })
+    await call("PATCH", f"/git/refs/heads/{branch}", json={"sha": commit["sha"]})
+
+    print(f"   ✅ Pushed {len(changed)} of {len(files)} files from {folder.name} to {repo}@{branch} ({commit['sha'][:7]})")
+    return commit["sha"]
@@ -0,0 +1,90 @@
+"""
+LLM response cache - exact-match memoization on disk.
+
+Deterministic calls (temperature == 0) with byte-identical messages always
+get the same answer, so reruns read it from SQLite instead of the network.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+
+class LLMCache:
+    """
+    SQLite-backed (model, temperature, messages) -> response cache.
+    Blocking sqlite calls run in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, path: str = "data/llm_cache.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()  # One connection shared by worker threads
+
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def cache_key(
+        model: str,
+        messages: List[dict],
+        temperature: float,
+        max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        SHA-256 over everything that determines the answer.
+        Returns None for sampled calls (temperature > 0) - those are not cacheable.
+        """
+        if temperature > 0:
+            return None
+        payload = json.dumps(
+            {"model": model, "temperature": temperature, "max_tokens": max_tokens, "messages": messages},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return cached response or None, counting hits/misses"""
+        response = await asyncio.get_running_loop().run_in_executor(None, self._get, key)
+        if response is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return response
+
+    async def set(self, key: str, response: str):
+        """Store a response (last write wins)"""
+        await asyncio.get_running_loop().run_in_executor(None, self._set, key, response)
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, response: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, int(time.time()))
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            self._conn.close()
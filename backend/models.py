@@ -4,9 +4,20 @@ No ORM bullshit, just Python dataclasses.
 """
 
 from dataclasses import dataclass, field, asdict
-from typing import List, Optional
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Set
 from datetime import datetime
+from pathlib import Path
+import gzip
 import json
+import os
+import re
+import threading
+
+try:
+    import orjson  # Optional C JSON codec for paper saves
+except ImportError:
+    orjson = None
 
 
 @dataclass
@@ -22,6 +33,16 @@ class QAPair:
     
     # Follow-up conversation support
     parent_qa_id: Optional[int] = None  # Index of parent QA in qa_pairs list (for follow-ups)
+    
+    def to_dict(self) -> dict:
+        return {
+            "question": self.question,
+            "answer": self.answer,
+            "timestamp": self.timestamp,
+            "thinking": self.thinking,
+            "is_reasoning": self.is_reasoning,
+            "parent_qa_id": self.parent_qa_id,
+        }
 
 
 @dataclass
@@ -60,13 +81,42 @@ class Paper:
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
     def to_dict(self) -> dict:
-        """Convert to dict for JSON serialization"""
-        data = asdict(self)
-        return data
+        """
+        Convert to dict for JSON serialization.
+        Built field by field: asdict() deep-copies recursively, including the
+        (large) html_content. Lists are still copied, so the dict can be
+        serialized in a worker thread while the paper keeps changing.
+        Keep in sync with the fields above.
+        """
+        return {
+            "id": self.id,
+            "title": self.title,
+            "authors": list(self.authors),
+            "abstract": self.abstract,
+            "url": self.url,
+            "html_url": self.html_url,
+            "html_content": self.html_content,
+            "preview_text": self.preview_text,
+            "is_relevant": self.is_relevant,
+            "relevance_score": self.relevance_score,
+            "extracted_keywords": list(self.extracted_keywords),
+            "one_line_summary": self.one_line_summary,
+            "detailed_summary": self.detailed_summary,
+            "qa_pairs": [qa.to_dict() for qa in self.qa_pairs],
+            "is_hidden": self.is_hidden,
+            "is_starred": self.is_starred,
+            "published_date": self.published_date,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Paper':
-        """Create Paper from dict"""
+        """
+        Create Paper from dict.
+        Paper files don't come through here: fetcher decodes them with msgspec
+        straight into Paper/QAPair; this is the lenient fallback / generic path.
+        """
         # Convert qa_pairs dicts to QAPair objects
         if 'qa_pairs' in data and data['qa_pairs']:
             data['qa_pairs'] = [
@@ -74,6 +124,70 @@ class Paper:
                 for qa in data['qa_pairs']
             ]
         return cls(**data)
+    
+    def to_storage_dict(self) -> dict:
+        """to_dict() for the paper's .json file: html_content lives in its own .html.gz"""
+        data = self.to_dict()
+        data["html_content"] = ""
+        return data
+    
+    def load_html(self, data_dir) -> str:
+        """
+        html_content, read lazily from <data_dir>/<id>.html.gz if not loaded yet.
+        Papers saved before the split keep it inline in the JSON and return that.
+        """
+        if not self.html_content:
+            self.html_content = read_html_body(data_dir, self.id)
+        return self.html_content
+
+
+def html_body_path(data_dir, paper_id: str) -> Path:
+    """Where a paper's full HTML text is stored, next to its metadata JSON"""
+    return Path(data_dir) / f"{paper_id}.html.gz"
+
+
+def read_html_body(data_dir, paper_id: str) -> str:
+    """A paper's HTML text from <id>.html.gz ("" if it has none); blocking"""
+    try:
+        with gzip.open(html_body_path(data_dir, paper_id), 'rt', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""  # No HTML version was available for this paper
+
+
+def dump_paper_json(data: dict) -> bytes:
+    """
+    The one on-disk paper JSON format: 2-space indent, sorted keys, UTF-8.
+    Same bytes with or without orjson, whichever component saves the paper.
+    """
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def write_paper_json(data_dir, paper_id: str, data: dict):
+    """
+    Write <id>.json atomically (temp file + rename): concurrent listings never
+    see a truncated file. The temp name is per thread, so parallel writers can't collide.
+    """
+    path = Path(data_dir) / f"{paper_id}.json"
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(dump_paper_json(data))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_html_body(data_dir, paper_id: str, html_content: str):
+    """Write a paper's HTML text (gzip level 1: fast, still ~2-3x smaller), atomically"""
+    path = html_body_path(data_dir, paper_id)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        f.write(html_content)
+    tmp_path.replace(path)
 
 
 @dataclass
@@ -99,10 +213,24 @@ class Config:
     max_tokens: int = 2000
     concurrent_papers: int = 3  # Number of papers to analyze concurrently
     min_relevance_score_for_stage2: float = 6.0  # Minimum relevance score for Stage 2 deep analysis
+    max_concurrent_requests: int = 16  # Max in-flight DeepSeek API requests (all stages combined)
+    max_context_chars: int = 60000  # Paper content cap for Stage 2 / Q&A context (0 = no limit)
+    enable_stage1_fastpath: bool = False  # Decide obvious keyword (non-)matches locally, without the API
+    strict_stage1: bool = False  # With fast path: still confirm fast accepts with the LLM
+    stage1_max_preview_chars: int = 2500  # Preview chars sent to Stage 1 (0 = no limit)
     
     def to_dict(self) -> dict:
         return asdict(self)
     
+    def match_keywords(self, text: str) -> Set[str]:
+        """
+        Every filter/negative keyword (original spelling) contained in text,
+        case-insensitive, found in one pass. The matcher is compiled once per
+        distinct keyword set, so edited configs pick up their new keywords.
+        """
+        matcher = _keyword_set_matcher(tuple(self.filter_keywords) + tuple(self.negative_keywords))
+        return matcher(text.lower())
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Config':
         return cls(**data)
@@ -122,3 +250,62 @@ class Config:
             # Return default config
             return cls()
 
+
+def compile_keyword_matcher(keywords: Iterable[str]) -> Callable[[str], Optional[str]]:
+    """
+    Build a single-pass multi-keyword matcher (one compiled regex alternation).
+    The returned function takes already-lowercased text and returns the first
+    matching keyword (original spelling) or None. Empty keywords are ignored.
+    """
+    by_lower = {}
+    for kw in keywords:
+        if kw and kw.strip():
+            by_lower.setdefault(kw.lower(), kw)
+    if not by_lower:
+        return lambda text: None
+    
+    # Longest first so overlapping keywords prefer the more specific one
+    pattern = re.compile("|".join(re.escape(k) for k in sorted(by_lower, key=len, reverse=True)))
+    
+    def match(text_lower: str) -> Optional[str]:
+        m = pattern.search(text_lower)
+        return by_lower[m.group(0)] if m else None
+    
+    return match
+
+
+@lru_cache(maxsize=32)
+def _keyword_set_matcher(keywords: tuple) -> Callable[[str], Set[str]]:
+    return compile_keyword_set_matcher(keywords)
+
+
+def compile_keyword_set_matcher(keywords: Iterable[str]) -> Callable[[str], Set[str]]:
+    """
+    Like compile_keyword_matcher, but the returned function yields ALL keywords
+    contained in the (already-lowercased) text - same result as checking
+    `kw.lower() in text` for each keyword, in a single regex scan.
+    """
+    by_lower = {}
+    for kw in keywords:
+        if kw and kw.strip():
+            by_lower.setdefault(kw.lower(), set()).add(kw)
+    if not by_lower:
+        return lambda text: set()
+    
+    # Zero-width lookahead reports the longest keyword starting at every position;
+    # shorter keywords inside a hit are implied by it, so overlaps are never lost
+    implied = {
+        k: frozenset(o for other in by_lower if other in k for o in by_lower[other])
+        for k in by_lower
+    }
+    pattern = re.compile(
+        "(?=(" + "|".join(re.escape(k) for k in sorted(by_lower, key=len, reverse=True)) + "))"
+    )
+    
+    def match(text_lower: str) -> Set[str]:
+        found: Set[str] = set()
+        for k in set(pattern.findall(text_lower)):
+            found |= implied[k]
+        return found
+    
+    return match
@@ -0,0 +1,343 @@
+"""
+Paper cache - the timeline lives in memory.
+
+Loads every paper JSON once on startup, then stays current through
+upsert() calls from the fetcher/analyzer save paths.
+List, search and stats requests read from here instead of the disk.
+"""
+
+import asyncio
+import dataclasses
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedKeyList
+
+from models import Paper
+
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _searchable_text(paper: Paper) -> str:
+    """Lowercased text that /search matches against"""
+    return (
+        f"{paper.title} {paper.abstract} "
+        f"{' '.join(paper.extracted_keywords)} {paper.one_line_summary}"
+    ).lower()
+
+
+def abstract_preview(abstract: str) -> str:
+    """Abstract truncated to 200 chars for timeline / search lists"""
+    return abstract[:200] + "..." if len(abstract) > 200 else abstract
+
+
+def timeline_item(paper: Paper) -> dict:
+    """Simplified paper data for timeline / search results"""
+    return {
+        "id": paper.id,
+        "title": paper.title,
+        "authors": paper.authors,
+        "abstract": abstract_preview(paper.abstract),
+        "url": paper.url,
+        "is_relevant": paper.is_relevant,
+        "relevance_score": paper.relevance_score,
+        "extracted_keywords": paper.extracted_keywords,
+        "one_line_summary": paper.one_line_summary,
+        "published_date": paper.published_date,
+        "is_starred": paper.is_starred,
+        "is_hidden": paper.is_hidden,
+        "created_at": paper.created_at,
+        "has_qa": len(paper.qa_pairs) > 0,
+        "detailed_summary": paper.detailed_summary,  # For Stage 2 status detection
+    }
+
+
+def _has_deep(paper: Paper) -> bool:
+    return bool(paper.detailed_summary and paper.detailed_summary.strip())
+
+
+def _relevance_key(paper: Paper) -> Tuple:
+    # Ascending; read in reverse: deep analysis first, then score, then newest
+    return (paper.has_deep_analysis, paper.relevance_score, paper.published_date or paper.created_at, paper.id)
+
+
+def _date_key(paper: Paper) -> Tuple:
+    return (paper.published_date or paper.created_at, paper.id)
+
+
+class InvertedIndex:
+    """
+    token -> paper ids, plus a trigram index over the token vocabulary.
+
+    Search is substring search, so query tokens may be partial words:
+    every query token must occur inside some token of a matching paper.
+    candidates() returns that superset; callers verify the exact match.
+    """
+
+    def __init__(self):
+        self.tokens: Dict[str, Set[str]] = {}  # token -> paper ids
+        self.doc_tokens: Dict[str, Set[str]] = {}  # paper id -> its tokens
+        self.trigrams: Dict[str, Set[str]] = {}  # 3-char shingle -> vocabulary tokens
+
+    def doc_freq(self, token: str) -> int:
+        return len(self.tokens.get(token, ()))
+
+    def add(self, paper_id: str, text: str):
+        self.remove(paper_id)
+        doc_tokens = set(_TOKEN_RE.findall(text))
+        self.doc_tokens[paper_id] = doc_tokens
+        for token in doc_tokens:
+            postings = self.tokens.get(token)
+            if postings is None:
+                postings = self.tokens[token] = set()
+                for gram in self._grams(token):
+                    self.trigrams.setdefault(gram, set()).add(token)
+            postings.add(paper_id)
+
+    def remove(self, paper_id: str):
+        for token in self.doc_tokens.pop(paper_id, ()):
+            postings = self.tokens[token]
+            postings.discard(paper_id)
+            if not postings:
+                # Token left the vocabulary
+                del self.tokens[token]
+                for gram in self._grams(token):
+                    vocab = self.trigrams[gram]
+                    vocab.discard(token)
+                    if not vocab:
+                        del self.trigrams[gram]
+
+    def clear(self):
+        self.tokens.clear()
+        self.doc_tokens.clear()
+        self.trigrams.clear()
+
+    def candidates(self, query_lower: str) -> Optional[Set[str]]:
+        """Paper ids that may contain query_lower; None = can't narrow (scan all)"""
+        query_tokens = set(_TOKEN_RE.findall(query_lower))
+        if not query_tokens:
+            return None
+
+        result: Optional[Set[str]] = None
+        # Rarest-looking (longest) tokens first so the intersection shrinks fast
+        for qt in sorted(query_tokens, key=len, reverse=True):
+            ids: Set[str] = set()
+            for token in self._vocab_containing(qt):
+                ids |= self.tokens[token]
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result
+
+    def _vocab_containing(self, fragment: str) -> List[str]:
+        grams = self._grams(fragment)
+        if not grams:
+            # Shorter than a trigram: scan the vocabulary (still far smaller than the texts)
+            return [t for t in self.tokens if fragment in t]
+        vocab = None
+        for gram in sorted(grams, key=lambda g: len(self.trigrams.get(g, ()))):
+            found = self.trigrams.get(gram)
+            if not found:
+                return []
+            vocab = set(found) if vocab is None else vocab & found
+            if not vocab:
+                return []
+        return [t for t in vocab if fragment in t]
+
+    @staticmethod
+    def _grams(token: str) -> Set[str]:
+        return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class PaperCache:
+    """
+    In-memory index of all papers.
+
+    Entries are metadata copies without html_content (the full text stays
+    on disk), so never save a cached paper back - load the full one first.
+    Entries are never mutated in place (upsert replaces them), so the
+    SortedKeyList keys stay valid, and the per-entry precomputed fields
+    (has_deep_analysis, timeline_dict, ...) can never go stale.
+    """
+
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self._by_id: Dict[str, Paper] = {}
+        self._sorted_by_date = SortedKeyList(key=_date_key)  # All papers (stats, search)
+        # Timeline buckets: visible papers split by is_starred, each in both orders,
+        # so /papers walks only the papers it can return
+        self._timeline = self._empty_timeline()
+        self._searchable: Dict[str, str] = {}  # id -> lowercased search text
+        self._index = InvertedIndex()
+        self._lock = asyncio.Lock()
+        self._reload_pending: Optional[Dict[str, Paper]] = None  # Upserts made while reloading
+        self.version = 0  # Bumped on every change; response caches key on it
+
+    async def reload_all(self):
+        """(Re)load every paper from disk without blocking the event loop"""
+        async with self._lock:
+            self._reload_pending = {}
+            try:
+                papers = await self.fetcher.list_papers_async(skip=0, limit=0)
+
+                self.clear()
+                entries = [self._light_copy(paper) for paper in papers]
+                for entry in entries:
+                    self._insert(entry)
+                # Bulk build is much cheaper than one-by-one inserts
+                self._sorted_by_date = SortedKeyList(entries, key=_date_key)
+                for starred, view in self._timeline.items():
+                    bucket = [e for e in entries if not e.is_hidden and e.is_starred == starred]
+                    view["relevance"] = SortedKeyList(bucket, key=_relevance_key)
+                    view["latest"] = SortedKeyList(bucket, key=_date_key)
+
+                # Saves that happened during the load are newer than the disk state
+                pending, self._reload_pending = self._reload_pending, None
+                for paper in pending.values():
+                    self.upsert(paper)
+            finally:
+                self._reload_pending = None
+
+        print(f"📚 Paper cache loaded: {len(self._by_id)} papers")
+
+    def upsert(self, paper: Paper):
+        """Insert or replace a paper (call after every save)"""
+        entry = self._light_copy(paper)
+        if self._reload_pending is not None:
+            self._reload_pending[paper.id] = entry
+
+        self.remove(paper.id)
+        self._insert(entry)
+        self._sorted_by_date.add(entry)
+        for ordered in self._timeline_lists(entry):
+            ordered.add(entry)
+        self.version += 1
+
+    def remove(self, paper_id: str):
+        """Drop a paper from the cache (no-op if absent)"""
+        if paper_id not in self._by_id:
+            return
+        self.version += 1
+        entry = self._by_id.pop(paper_id)
+        del self._searchable[paper_id]
+        self._index.remove(paper_id)
+        self._sorted_by_date.discard(entry)
+        for ordered in self._timeline_lists(entry):
+            ordered.discard(entry)
+
+    def clear(self):
+        """Forget everything (e.g. after the paper files were cleaned up)"""
+        self._by_id.clear()
+        self._sorted_by_date.clear()
+        self._timeline = self._empty_timeline()
+        self._searchable.clear()
+        self._index.clear()
+        self.version += 1
+
+    def get(self, paper_id: str) -> Optional[Paper]:
+        return self._by_id.get(paper_id)
+
+    def all(self) -> List[Paper]:
+        """All cached papers, newest first"""
+        return list(reversed(self._sorted_by_date))
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def snapshot(
+        self,
+        sort_by: str = "relevance",
+        starred_only: bool = False,
+        keyword: Optional[str] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Paper]:
+        """
+        Visible papers for the timeline, already sorted.
+        starred_only=True returns only starred papers, False excludes them.
+        With limit, stops walking the sorted list once the page is filled.
+        """
+        view = self._timeline[bool(starred_only)]
+        ordered = view["relevance"] if sort_by == "relevance" else view["latest"]
+        keyword_lower = keyword.lower() if keyword else None
+        end = skip + limit if limit is not None else None
+
+        if not keyword_lower:
+            # Bucket already holds exactly the matching papers: slice by position
+            total = len(ordered)
+            stop = total if end is None else min(end, total)
+            if skip >= stop:
+                return []
+            return list(ordered.islice(total - stop, total - skip, reverse=True))
+
+        result = []
+        for paper in reversed(ordered):
+            if keyword_lower and keyword_lower not in paper.keywords_lower:
+                continue
+            result.append(paper)
+            if end is not None and len(result) >= end:
+                break
+        return result[skip:]
+
+    def search(self, q: str) -> List[Tuple[Paper, int]]:
+        """
+        Visible papers whose search text contains q (case-insensitive),
+        with the occurrence count as score, newest first.
+        """
+        q_lower = q.lower()
+        candidates = self._index.candidates(q_lower)
+
+        if candidates is None:
+            papers = reversed(self._sorted_by_date)
+        else:
+            papers = sorted((self._by_id[i] for i in candidates), key=_date_key, reverse=True)
+
+        results = []
+        for paper in papers:
+            if paper.is_hidden:
+                continue
+            searchable = self._searchable[paper.id]
+            if q_lower in searchable:
+                results.append((paper, searchable.count(q_lower)))
+        return results
+
+    # ============ Internals ============
+
+    @staticmethod
+    def _empty_timeline() -> Dict[bool, Dict[str, SortedKeyList]]:
+        return {
+            starred: {"relevance": SortedKeyList(key=_relevance_key), "latest": SortedKeyList(key=_date_key)}
+            for starred in (False, True)
+        }
+
+    def _timeline_lists(self, entry: Paper) -> Tuple:
+        """Timeline lists this entry belongs to (none if hidden)"""
+        if entry.is_hidden:
+            return ()
+        view = self._timeline[bool(entry.is_starred)]
+        return (view["relevance"], view["latest"])
+
+    @staticmethod
+    def _light_copy(paper: Paper) -> Paper:
+        # Own lists: the analyzer keeps mutating the original object
+        entry = dataclasses.replace(
+            paper,
+            html_content="",
+            extracted_keywords=list(paper.extracted_keywords),
+            qa_pairs=list(paper.qa_pairs),
+        )
+        entry.has_deep_analysis = _has_deep(paper)
+        # Lowercased blobs for the keyword filter / negative-keyword recheck
+        entry.keywords_lower = ' '.join(paper.extracted_keywords).lower()
+        entry.preview_lower = f"{paper.title} {paper.preview_text}".lower()
+        # Built once per version of the paper, reused by every /papers and /search response
+        entry.timeline_dict = timeline_item(entry)
+        return entry
+
+    def _insert(self, paper: Paper):
+        """Register paper in the id map and search index (sorted lists are handled by callers)"""
+        self._by_id[paper.id] = paper
+        searchable = _searchable_text(paper)
+        self._searchable[paper.id] = searchable
+        self._index.add(paper.id, searchable)
@@ -7,30 +7,119 @@ Linus philosophy: "Do one thing and do it well"
 """
 
 import os
+import functools
+import gzip
 import hashlib
+import json
+import mmap
 import shutil
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import xxhash  # Non-cryptographic, >10x faster than MD5; optional
+except ImportError:
+    xxhash = None
+
+
+# href="..." / src="..." pointing at a .js or .css file
+_REF_RE = re.compile(r'(href|src)=(["\'])([^"\']*\.(?:js|css)[^"\']*)\2')
+# Resource path below /static/, e.g. "app.js" or "css/style.css"
+_STATIC_RE = re.compile(r'/static/(.+\.(?:js|css))')
+# Existing cache-busting parameter
+_VER_RE = re.compile(r'\?v=[a-f0-9]+')
+
 
 def calculate_file_hash(filepath: str) -> str:
-    """Calculate MD5 hash of file content - simple and reliable"""
-    hasher = hashlib.md5()
+    """
+    Content hash for cache busting - only has to change when the file does,
+    so xxh3 (when installed) beats MD5; MD5 otherwise.
+    """
+    hasher = xxhash.xxh3_64() if xxhash else hashlib.md5()
     with open(filepath, 'rb') as f:
-        hasher.update(f.read())
+        if os.fstat(f.fileno()).st_size:  # mmap can't map an empty file
+            # Hash straight from the page cache, no bytes copy of the whole file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
     return hasher.hexdigest()[:8]  # First 8 chars is enough
 
 
+# Below this many files a process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 16
+
+
+def _parallel_map(fn, items: list) -> list:
+    """map() over a process pool (CPU-bound per-file work), or inline for small builds"""
+    if len(items) < PARALLEL_MIN_FILES:
+        return [fn(item) for item in items]
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(fn, items, chunksize=8))
+
+
+def _rewrite_html(html_file: Path, file_hashes: dict) -> str:
+    """
+    Append ?v=<hash> to every /static/ JS/CSS reference in one HTML file.
+    Module-level so process pool workers can run it; returns a status line.
+    """
+    content = html_file.read_text(encoding='utf-8')
+    if not _REF_RE.search(content):
+        return "no JS/CSS references"
+    
+    # Replace CSS references: href="/static/style.css" -> href="/static/style.css?v=hash"
+    # Pattern: matches href="..." or src="..." with .js or .css files
+    def replace_reference(match):
+        attr = match.group(1)  # href or src
+        quote = match.group(2)  # " or '
+        path = match.group(3)   # the file path
+        
+        # Extract the static resource path
+        # Pattern: /static/xxx/file.js or /static/file.css
+        static_match = _STATIC_RE.search(path)
+        if static_match:
+            resource_path = static_match.group(1)  # e.g., "app.js" or "style.css"
+            
+            if resource_path in file_hashes:
+                file_hash = file_hashes[resource_path]
+                # Remove existing version parameter if present
+                path_clean = _VER_RE.sub('', path)
+                path_versioned = f"{path_clean}?v={file_hash}"
+                return f'{attr}={quote}{path_versioned}{quote}'
+        
+        return match.group(0)  # No change
+    
+    # Match href="..." or src="..." for .js and .css files
+    new_content = _REF_RE.sub(replace_reference, content)
+    
+    if new_content == content:
+        return "no changes"
+    html_file.write_text(new_content, encoding='utf-8')
+    return "updated"
+
+
+MANIFEST_NAME = ".manifest.json"
+
+
+def _load_manifest(dest_path: Path) -> dict:
+    """Source file hashes recorded by the previous build ({} if none / unreadable)"""
+    try:
+        return json.loads((dest_path / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
 def build_static_assets(source_dir: str = "frontend", dest_dir: str = "frontend_dist"):
     """
     Build static assets with cache busting
     
     Simple flow:
-    1. Calculate hash for all JS/CSS files
-    2. Copy entire frontend/ to frontend_dist/
-    3. Replace all references in HTML files with versioned URLs
+    1. Calculate hash for all source files (JS/CSS hashes become ?v= versions)
+    2. Copy changed files from frontend/ to frontend_dist/
+    3. Replace references in changed HTML files (or HTML pointing at changed assets)
+    4. Precompress changed files
     
-    No special cases, no complex logic.
+    frontend_dist/.manifest.json remembers the hashes, so a warm build only
+    touches what changed - and nothing at all when no source file did.
     """
     print(f"[Build] Starting static assets build...")
     
@@ -41,81 +130,90 @@ def build_static_assets(source_dir: str = "frontend", dest_dir: str = "frontend_
         print(f"[Build] Error: Source directory {source_dir} not found")
         return False
     
-    # Step 1: Calculate hashes for all JS/CSS files
+    # Step 1: Calculate hashes for all source files
     print(f"[Build] Calculating file hashes...")
-    file_hashes = {}
-    
-    for pattern in ["**/*.js", "**/*.css"]:
-        for filepath in source_path.glob(pattern):
-            if filepath.is_file():
-                relative_path = filepath.relative_to(source_path)
-                file_hash = calculate_file_hash(filepath)
-                file_hashes[str(relative_path)] = file_hash
-                print(f"[Build]   {relative_path} -> {file_hash}")
+    source_files = sorted(p for p in source_path.glob("**/*") if p.is_file())
+    manifest = {
+        str(filepath.relative_to(source_path)): file_hash
+        for filepath, file_hash in zip(source_files, _parallel_map(calculate_file_hash, source_files))
+    }
+    file_hashes = {path: h for path, h in manifest.items() if path.endswith((".js", ".css"))}
+    for relative_path, file_hash in file_hashes.items():
+        print(f"[Build]   {relative_path} -> {file_hash}")
     
     if not file_hashes:
         print(f"[Build] Warning: No JS/CSS files found in {source_dir}")
     
-    # Step 2: Clean and copy frontend directory
-    print(f"[Build] Copying {source_dir}/ to {dest_dir}/...")
-    if dest_path.exists():
-        shutil.rmtree(dest_path)
-    shutil.copytree(source_path, dest_path)
+    previous = _load_manifest(dest_path)
+    if previous == manifest and all((dest_path / path).is_file() for path in manifest):
+        print(f"[Build] No source changes since last build, {dest_dir}/ is up to date")
+        return True
+    
+    # Step 2: Copy only new / changed files, drop files removed from the source
+    if not previous and dest_path.exists():
+        shutil.rmtree(dest_path)  # No manifest: unknown contents, start clean
+    changed = [path for path, h in manifest.items() if previous.get(path) != h or not (dest_path / path).is_file()]
+    removed = [path for path in previous if path not in manifest]
+    print(f"[Build] Copying {len(changed)} changed files from {source_dir}/ to {dest_dir}/...")
+    # Manifest goes first: an interrupted build must not look up to date
+    (dest_path / MANIFEST_NAME).unlink(missing_ok=True)
+    for path in removed:
+        (dest_path / path).unlink(missing_ok=True)
+        (dest_path / f"{path}.gz").unlink(missing_ok=True)
+    for path in changed:
+        target = dest_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source_path / path, target)
     print(f"[Build] Copy completed")
     
     # Step 3: Update HTML files with versioned URLs
     print(f"[Build] Updating HTML references...")
-    html_files = list(dest_path.glob("**/*.html"))
+    changed_assets = [path for path in changed if path in file_hashes]
+    html_files = []
+    for path in manifest:
+        if not path.endswith(".html"):
+            continue
+        html_file = dest_path / path
+        # An unchanged HTML file only needs a rewrite if it points at a changed asset
+        if path in changed or (changed_assets and any(
+            asset in html_file.read_text(encoding='utf-8') for asset in changed_assets
+        )):
+            html_files.append(html_file)
     
-    for html_file in html_files:
-        print(f"[Build]   Processing {html_file.name}...")
-        
-        with open(html_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Replace CSS references: href="/static/style.css" -> href="/static/style.css?v=hash"
-        # Pattern: matches href="..." or src="..." with .js or .css files
-        def replace_reference(match):
-            attr = match.group(1)  # href or src
-            quote = match.group(2)  # " or '
-            path = match.group(3)   # the file path
-            
-            # Extract the static resource path
-            # Pattern: /static/xxx/file.js or /static/file.css
-            static_match = re.search(r'/static/(.+\.(?:js|css))', path)
-            if static_match:
-                resource_path = static_match.group(1)  # e.g., "app.js" or "style.css"
-                
-                if resource_path in file_hashes:
-                    file_hash = file_hashes[resource_path]
-                    # Remove existing version parameter if present
-                    path_clean = re.sub(r'\?v=[a-f0-9]+', '', path)
-                    path_versioned = f"{path_clean}?v={file_hash}"
-                    return f'{attr}={quote}{path_versioned}{quote}'
-            
-            return match.group(0)  # No change
-        
-        # Match href="..." or src="..." for .js and .css files
-        content = re.sub(
-            r'(href|src)=(["\'"])([^"\']*\.(?:js|css)[^"\']*)\2',
-            replace_reference,
-            content
-        )
-        
-        if content != original_content:
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"[Build]     Updated {html_file.name}")
-        else:
-            print(f"[Build]     No changes in {html_file.name}")
+    results = _parallel_map(functools.partial(_rewrite_html, file_hashes=file_hashes), html_files)
+    for html_file, status in zip(html_files, results):
+        print(f"[Build]   {html_file.name}: {status}")
+    
+    # Step 4: Precompress text assets (served as-is to clients that accept gzip)
+    print(f"[Build] Precompressing assets...")
+    compressed = precompress_assets(dest_path, {dest_path / path for path in changed} | set(html_files))
+    
+    (dest_path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
     
     print(f"[Build] Build completed successfully!")
-    print(f"[Build] Processed {len(file_hashes)} assets, {len(html_files)} HTML files")
+    print(f"[Build] Processed {len(file_hashes)} assets, {len(html_files)} HTML files, {compressed} .gz files")
     return True
 
 
+def precompress_assets(dest_path: Path, files=None, min_size: int = 1000) -> int:
+    """Write file.gz next to every JS/CSS/HTML file (keeps the original); files limits the set"""
+    count = 0
+    for pattern in ["**/*.js", "**/*.css", "**/*.html"]:
+        for filepath in dest_path.glob(pattern):
+            if files is not None and filepath not in files:
+                continue
+            gz_path = filepath.with_name(filepath.name + ".gz")
+            if not filepath.is_file() or filepath.stat().st_size < min_size:
+                gz_path.unlink(missing_ok=True)  # Never serve a .gz of an older, bigger version
+                continue  # Too small to be worth it (same threshold as the GZip middleware)
+            data = filepath.read_bytes()
+            # mtime=0: identical input gives identical .gz (stable ETag across builds)
+            gz_path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+            print(f"[Build]   {filepath.relative_to(dest_path)}.gz ({len(data)} -> {gz_path.stat().st_size} bytes)")
+            count += 1
+    return count
+
+
 if __name__ == "__main__":
     success = build_static_assets()
     exit(0 if success else 1)
@@ -53,7 +53,7 @@ config_path = Path("data/config.json")
 config_path.parent.mkdir(parents=True, exist_ok=True)
 
 # Create config with custom dates
-config_dict = DEFAULT_CONFIG.copy()
+config_dict = dict(DEFAULT_CONFIG)
 config_dict["start_date"] = "$start_date"
 config_dict["end_date"] = "$end_date"
 